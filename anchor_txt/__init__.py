@@ -21,13 +21,21 @@ anchor_txt adds the ability to embed attributes in markdown files so that
 external tools can more easily link them to eachother and code, as well as
 perform other operations.
 
-Use ``anchor_txt.Section.from_md_path`` to load a markdown file.
+Use ``anchor_txt.Section.from_md_path`` to load a markdown file, or
+``anchor_txt.Section.from_md_paths`` to load many files in parallel.
 
 The syntax used is in the README.md
 """
 from __future__ import print_function
 
+import os
+
 from .section import Section
+from .section import PARALLEL_MIN_BYTES
+from .cache import ParseCache
+from .index import AnchorIndex
+from .index import AttributeIndex
+from .stats import Stats
 from .mdsplit import Header
 from .mdsplit import ReferenceLink
 from .mdsplit import Code
@@ -43,20 +51,218 @@ def main(argv):
         description=
         'Process a markdown file into sections and attributes and print to stdout'
     )
-    parser.add_argument('path', help='path to a markdown file')
-    parser.add_argument('--format',
-                        help='format to output to on of [json, yaml]',
-                        default='yaml')
+    parser.add_argument(
+        'path',
+        nargs='+',
+        help='path to a markdown file or a directory of markdown files')
+    parser.add_argument(
+        '--format',
+        help='format to output to, one of [yaml, json, jsonl]. jsonl writes '
+        'a line of json for every section as soon as its file is parsed',
+        default='yaml')
+    parser.add_argument(
+        '--no-contents',
+        action='store_true',
+        help='with --format jsonl, leave the contents out of the records')
+    parser.add_argument(
+        '--attributes-only',
+        action='store_true',
+        help='only parse the headers and attributes, the contents of every '
+        'section are left out. Much faster for large files')
+    parser.add_argument(
+        '--workers',
+        type=int,
+        default=None,
+        help='number of processes used to parse files, default is #cpus')
+    parser.add_argument(
+        '--cache-dir',
+        default=None,
+        help='directory to cache parsed files in, unchanged files are not '
+        're-parsed')
+    parser.add_argument(
+        '--stats',
+        action='store_true',
+        help='print the time spent in each phase of parsing to stderr')
+    parser.add_argument(
+        '--watch',
+        action='store_true',
+        help='keep running, re-parsing files when they change. Each change is '
+        'written to stdout as a line of json, or see --output-dir')
+    parser.add_argument(
+        '--output-dir',
+        default=None,
+        help='with --watch, write each file as json to OUTPUT_DIR/PATH.json '
+        'instead, where PATH is relative to the watched directory')
+    parser.add_argument(
+        '--serve',
+        default=None,
+        metavar='SOCKET',
+        help='keep running, answering JSON-RPC requests on the unix socket '
+        'SOCKET, or stdin/stdout if SOCKET is "-". Requires python 3.5+')
     args = parser.parse_args(argv)
 
-    root = Section.from_md_path(args.path).to_dict()
+    if args.format not in ('yaml', 'json', 'jsonl'):
+        sys.stderr.write('Invalid --format={}\n'.format(args.format))
+        return 1
+
+    if args.attributes_only and (args.cache_dir or args.watch or args.serve):
+        sys.stderr.write('--attributes-only can\'t be used with --cache-dir, '
+                         '--watch or --serve\n')
+        return 1
+
+    cache = ParseCache(args.cache_dir) if args.cache_dir else None
+    stats = Stats() if args.stats else None
+
+    if args.watch:
+        return _watch(args.path, cache, args.output_dir)
+
+    if args.serve:
+        return _serve(args.path, args.serve, args.workers, cache)
+
+    if len(args.path) == 1 and not os.path.isdir(args.path[0]):
+        single = args.path[0]
+        items = [(single,
+                  _load_single(single, args.workers, cache, stats,
+                               args.attributes_only))]
+    else:
+        single = None
+        items = Section.iter_md_paths(args.path,
+                                      workers=args.workers,
+                                      cache=cache,
+                                      stats=stats,
+                                      attributes_only=args.attributes_only)
+
     if args.format == 'yaml':
         import yaml
+        # Multiple files are output as a mapping of path -> section
+        root = {}
+        for path, section in items:
+            if stats is not None:
+                stats.start('serialize')
+            root[path] = section.to_dict()
+            if stats is not None:
+                stats.stop()
+        if single is not None:
+            root = root[single]
+        if stats is not None:
+            stats.start('serialize')
         print(yaml.safe_dump(root, indent=4))
-    elif args.format == 'json':
-        import json
-        print(json.dumps(root, indent=4))
+        if stats is not None:
+            stats.stop()
     else:
-        sys.stderr.write('Invalid --format={}\n'.format(args.format))
-        return 1
+        _write_json(items, args.format, single, not args.no_contents, stats)
+
+    if stats is not None:
+        sys.stderr.write(stats.report() + '\n')
+    return 0
+
+
+def _write_json(items, output_format, single, contents, stats):
+    """Stream the sections as json (or jsonl) to stdout."""
+    import sys
+    from . import serialize
+
+    if single is not None and output_format != 'jsonl':
+        # the single file is already parsed
+        chunks = serialize.iter_json(items[0][1])
+    else:
+        if stats is not None:
+            items = _untimed(items, stats)
+        if output_format == 'jsonl':
+            chunks = (json_line for path, section in items
+                      for json_line in _jsonl(section, path, contents))
+        else:
+            chunks = serialize.iter_json_mapping(items)
+
+    if stats is not None:
+        chunks = stats.timed_iter('serialize', chunks)
+    for chunk in chunks:
+        sys.stdout.write(chunk)
+    if output_format != 'jsonl':
+        sys.stdout.write('\n')
+
+
+def _load_single(path, workers, cache, stats, attributes_only):
+    """Load a single file, splitting it between processes if it is large."""
+    if (cache is None and stats is None and workers != 1
+            and not attributes_only
+            and os.path.getsize(path) >= PARALLEL_MIN_BYTES):
+        with open(path) as fdesc:
+            return Section.from_md_parallel(fdesc.read(), workers=workers)
+    return Section.from_md_path(path,
+                                cache=cache,
+                                stats=stats,
+                                attributes_only=attributes_only)
+
+
+def _untimed(items, stats):
+    """Pause the serialize phase while the next file is parsed."""
+    iterator = iter(items)
+    while True:
+        stats.stop()
+        try:
+            item = next(iterator)
+        except StopIteration:
+            return
+        finally:
+            stats.start('serialize')
+        yield item
+
+
+def _jsonl(section, path, contents):
+    import json
+    from . import serialize
+
+    for record in serialize.iter_records(section, path, contents=contents):
+        yield json.dumps(record) + '\n'
+
+
+def _serve(paths, address, workers, cache):
+    """Run the cmdline in server mode until stdin closes or it is killed."""
+    from . import server
+
+    sections = Section.iter_md_paths(paths, workers=workers, cache=cache)
+    corpus = server.Corpus(
+        sections,
+        loader=lambda path: Section.from_md_path(path, cache=cache))
+    server.serve(corpus, address)
     return 0
+
+
+def _watch(paths, cache, output_dir):
+    """Run the cmdline in watch mode, never returns."""
+    import sys
+    import json
+    from .watch import Watcher
+
+    watcher = Watcher(paths,
+                      loader=lambda path: Section.from_md_path(path,
+                                                               cache=cache))
+    for event in watcher.watch():
+        section = event.section.to_dict() if event.section else None
+        error = str(event.error) if event.error else None
+        if output_dir is None:
+            sys.stdout.write(
+                json.dumps({
+                    "event": event.kind,
+                    "path": event.path,
+                    "section": section,
+                    "error": error,
+                }) + '\n')
+            sys.stdout.flush()
+            continue
+
+        # relative to the watched directory, so '..' can't leave output_dir
+        out_path = os.path.join(output_dir,
+                                watcher.relpath(event.path) + '.json')
+        if event.kind == 'changed':
+            out_dir = os.path.dirname(out_path)
+            if not os.path.isdir(out_dir):
+                os.makedirs(out_dir)
+            with open(out_path, 'w') as fdesc:
+                json.dump(section, fdesc, indent=4)
+        elif event.kind == 'removed':
+            if os.path.exists(out_path):
+                os.remove(out_path)
+        else:
+            sys.stderr.write('{}: {}\n'.format(event.path, error))
@@ -0,0 +1,108 @@
+# anchor_txt: attributes in markdown
+#
+# Copyright (C) 2019 Rett Berg <github.com/vitiral>
+#
+# The source code is Licensed under either of
+#
+# * Apache License, Version 2.0, ([LICENSE-APACHE](LICENSE-APACHE) or
+#   http://www.apache.org/licenses/LICENSE-2.0)
+# * MIT license ([LICENSE-MIT](LICENSE-MIT) or
+#   http://opensource.org/licenses/MIT)
+#
+# at your option.
+#
+# Unless you explicitly state otherwise, any contribution intentionally submitted
+# for inclusion in the work by you, as defined in the Apache-2.0 license, shall
+# be dual licensed as above, without any additional terms or conditions.
+"""Load markdown files from asyncio without blocking the event loop.
+
+Files are read in the loop's default (thread) executor and parsed in a
+configurable executor, pass a ``concurrent.futures.ProcessPoolExecutor`` to
+parse on many cpus. Requires python 3.5+.
+"""
+from __future__ import unicode_literals
+
+import asyncio
+import functools
+
+from . import utils
+from .section import Section
+
+# default number of files read and parsed at the same time
+DEFAULT_LIMIT = 16
+
+
+async def load_md_path(path, cls=Section, executor=None, cache=None):
+    """Load a markdown file at a path as a Section.
+
+    executor: the executor the file is parsed in, default is the loop's.
+    cache: an optional ``anchor_txt.cache.ParseCache``. With a cache the whole
+      load happens in the executor, as a hit only reads the cache entry.
+    """
+    loop = asyncio.get_event_loop()
+    if cache is not None:
+        return await loop.run_in_executor(
+            executor, functools.partial(cls.from_md_path, path, cache=cache))
+    md_text = await loop.run_in_executor(None, _read_text, path)
+    return await loop.run_in_executor(executor,
+                                      functools.partial(cls.from_md, md_text))
+
+
+def as_completed(paths,
+                 cls=Section,
+                 executor=None,
+                 limit=DEFAULT_LIMIT,
+                 cache=None):
+    """Load many markdown files, returning an iterator of awaitables in the
+    order they complete (like ``asyncio.as_completed``).
+
+    Each awaitable returns ``(path, Section)`` or raises the error of its
+    file. Directories in ``paths`` are searched recursively for ``*.md``
+    files (before returning, in this thread). At most ``limit`` files are
+    loaded at the same time.
+
+    Example::
+
+        for load in aio.as_completed(paths):
+            path, section = await load
+    """
+    return _as_completed(utils.find_md_paths(paths), cls, executor, limit,
+                         cache)
+
+
+async def load_md_paths(paths,
+                        cls=Section,
+                        executor=None,
+                        limit=DEFAULT_LIMIT,
+                        cache=None):
+    """Load many markdown files, returning a list of ``(path, Section)`` in
+    the stable order of ``Section.from_md_paths``.
+
+    See ``as_completed``, directories are searched in the default executor.
+    """
+    loop = asyncio.get_event_loop()
+    paths = await loop.run_in_executor(None, utils.find_md_paths, paths)
+    sections = {}
+    for load in _as_completed(paths, cls, executor, limit, cache):
+        path, section = await load
+        sections[path] = section
+    return [(path, sections[path]) for path in paths]
+
+
+def _as_completed(paths, cls, executor, limit, cache):
+    semaphore = asyncio.Semaphore(limit)
+
+    async def load(path):
+        async with semaphore:
+            section = await load_md_path(path,
+                                         cls=cls,
+                                         executor=executor,
+                                         cache=cache)
+        return path, section
+
+    return asyncio.as_completed([load(path) for path in paths])
+
+
+def _read_text(path):
+    with open(path) as fdesc:
+        return fdesc.read()
@@ -0,0 +1,217 @@
+# anchor_txt: attributes in markdown
+#
+# Copyright (C) 2019 Rett Berg <github.com/vitiral>
+#
+# The source code is Licensed under either of
+#
+# * Apache License, Version 2.0, ([LICENSE-APACHE](LICENSE-APACHE) or
+#   http://www.apache.org/licenses/LICENSE-2.0)
+# * MIT license ([LICENSE-MIT](LICENSE-MIT) or
+#   http://opensource.org/licenses/MIT)
+#
+# at your option.
+#
+# Unless you explicitly state otherwise, any contribution intentionally submitted
+# for inclusion in the work by you, as defined in the Apache-2.0 license, shall
+# be dual licensed as above, without any additional terms or conditions.
+"""Decode the attributes embedded in markdown.
+
+Attributes are yaml (or json), but most inline attributes are trivial such as
+`` `@{foo}` `` or `` `@{foo: bar}` ``, which are decoded without invoking a yaml
+parser at all.
+
+``yaml`` and ``json`` are only imported once an attribute needs them, importing
+yaml takes longer than parsing a typical file.
+"""
+from __future__ import unicode_literals
+
+import re
+import copy
+import six
+
+from . import utils
+
+_IDENTIFIER = r'[A-Za-z_][A-Za-z0-9_-]*'
+_INTEGER = r'[-+]?(?:0|[1-9][0-9]*)'
+
+SIMPLE_KEY_RE = re.compile(r'^({})$'.format(_IDENTIFIER))
+SIMPLE_KEY_VALUE_RE = re.compile(r'^({0}):[ \t]+(?:({0})|({1}))$'.format(
+    _IDENTIFIER, _INTEGER))
+
+# yaml documents with lines starting with these can't be batched into a stream
+_STREAM_MARKERS = ('---', '...', '%')
+
+# set by yaml_loader()
+_YAML_LOADER = None
+
+# Identifiers which yaml resolves to something other than a string.
+_YAML_WORDS = frozenset(['yes', 'no', 'true', 'false', 'on', 'off', 'null'])
+
+
+class DecodeError(ValueError):
+    """An attribute could not be decoded.
+
+    ``line`` is the (1 based) line the attribute is on and ``error`` is the
+    error from the decoder.
+    """
+    def __init__(self, line, error):
+        ValueError.__init__(self, "line {}: {}".format(line, error))
+        self.line = line
+        self.error = error
+
+    def __reduce__(self):
+        # so that errors raised in worker processes can be pickled
+        return (self.__class__, (self.line, self.error))
+
+
+def load_all(snippets):
+    """Decode a list of ``(attribute_format, text, line)`` attribute snippets.
+
+    ``attribute_format`` is None for inline attributes, which are decoded as
+    in ``load_inline``. Identical yaml snippets are only decoded once and,
+    when libyaml is available, all yaml snippets are decoded as a single
+    stream of yaml documents.
+
+    Returns the list of decoded values. Raises DecodeError if any snippet is
+    invalid.
+    """
+    values = [None] * len(snippets)
+
+    # unique yaml texts in the order they are first seen, and text -> indexes
+    yaml_texts = []
+    yaml_lines = []
+    yaml_indexes = {}
+    for i, (attribute_format, text, line) in enumerate(snippets):
+        if attribute_format is None:
+            value = _load_simple(text)
+            if value is not None:
+                values[i] = value
+                continue
+        elif attribute_format == 'json':
+            import json
+            try:
+                values[i] = json.loads(text)
+            except ValueError as err:
+                raise DecodeError(line, err)
+            continue
+
+        indexes = yaml_indexes.get(text)
+        if indexes is None:
+            indexes = yaml_indexes[text] = []
+            yaml_texts.append(text)
+            yaml_lines.append(line)
+        indexes.append(i)
+
+    decoded = _load_yaml_texts(yaml_texts, yaml_lines)
+    for text, value in zip(yaml_texts, decoded):
+        for num, i in enumerate(yaml_indexes[text]):
+            # don't share mutable values between sections
+            item = value if num == 0 else copy.deepcopy(value)
+            if snippets[i][0] is None:
+                item = _inline_value(item)
+            values[i] = item
+
+    return values
+
+
+def load_inline(text):
+    """Decode the text of an inline attribute, i.e. the ``foo`` in `` `@{foo}` ``.
+
+    A lone string ``foo`` is converted to ``{foo: None}``.
+    """
+    value = _load_simple(text)
+    if value is None:
+        value = _inline_value(load_yaml(text))
+    return value
+
+
+def load_block(attribute_format, text):
+    """Decode the text of an attribute code block of the given format."""
+    if attribute_format == 'json':
+        import json
+        return json.loads(text)
+    return load_yaml(text)
+
+
+def load_yaml(text):
+    """``yaml.safe_load`` using libyaml when it is available."""
+    yaml, loader = yaml_loader()
+    return yaml.load(text, Loader=loader)
+
+
+def yaml_loader():
+    """Import yaml, returning ``(yaml, Loader)``.
+
+    The loader is ``yaml.CSafeLoader`` when pyyaml was built with libyaml,
+    otherwise ``yaml.SafeLoader``.
+    """
+    global _YAML_LOADER  # pylint: disable=global-statement
+    import yaml
+    if _YAML_LOADER is None:
+        _YAML_LOADER = getattr(yaml, 'CSafeLoader', yaml.SafeLoader)
+    return yaml, _YAML_LOADER
+
+
+def _inline_value(value):
+    value = utils.to_unicode(value)
+    if isinstance(value, six.text_type):
+        value = {value: None}
+    return value
+
+
+def _load_yaml_texts(texts, lines):
+    """Decode a list of yaml texts, attributing errors to their lines."""
+    if not texts:
+        return []
+    yaml, loader = yaml_loader()
+    if (loader is not yaml.SafeLoader and len(texts) > 1
+            and all(_can_stream(text) for text in texts)):
+        # Only worth it with libyaml, the pure python loader is slower
+        # with a stream.
+        stream = ''.join('---\n' + text + '\n' for text in texts)
+        try:
+            values = list(yaml.load_all(stream, Loader=loader))
+        except yaml.YAMLError:
+            # decode them one at a time to find the failure
+            values = None
+        if values is not None and len(values) == len(texts):
+            return values
+
+    values = []
+    for text, line in zip(texts, lines):
+        try:
+            values.append(load_yaml(text))
+        except yaml.YAMLError as err:
+            raise DecodeError(line, err)
+    return values
+
+
+def _can_stream(text):
+    return not any(
+        line.startswith(_STREAM_MARKERS) for line in text.split('\n'))
+
+
+def _load_simple(text):
+    """Decode the simple forms ``key`` and ``key: value`` without yaml.
+
+    Return None if the text is not one of the simple forms.
+    """
+    text = text.strip()
+    mat = SIMPLE_KEY_RE.match(text)
+    if mat:
+        if text.lower() in _YAML_WORDS:
+            return None
+        return {text: None}
+
+    mat = SIMPLE_KEY_VALUE_RE.match(text)
+    if mat:
+        key, string, integer = mat.groups()
+        if key.lower() in _YAML_WORDS:
+            return None
+        if integer is not None:
+            return {key: int(integer)}
+        if string.lower() in _YAML_WORDS:
+            return None
+        return {key: string}
+
+    return None
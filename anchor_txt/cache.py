@@ -0,0 +1,155 @@
+# anchor_txt: attributes in markdown
+#
+# Copyright (C) 2019 Rett Berg <github.com/vitiral>
+#
+# The source code is Licensed under either of
+#
+# * Apache License, Version 2.0, ([LICENSE-APACHE](LICENSE-APACHE) or
+#   http://www.apache.org/licenses/LICENSE-2.0)
+# * MIT license ([LICENSE-MIT](LICENSE-MIT) or
+#   http://opensource.org/licenses/MIT)
+#
+# at your option.
+#
+# Unless you explicitly state otherwise, any contribution intentionally submitted
+# for inclusion in the work by you, as defined in the Apache-2.0 license, shall
+# be dual licensed as above, without any additional terms or conditions.
+"""Persistent on-disk cache of parsed markdown files."""
+from __future__ import unicode_literals
+
+import os
+import errno
+
+import six
+
+# Bump this whenever the output of the parser changes, which invalidates all
+# existing cache entries.
+CACHE_VERSION = 1
+
+
+class ParseCache(object):
+    """A directory of parsed markdown files, stored as ``Section.to_dict()`` json.
+
+    Entries are keyed by the absolute path of the markdown file and are only
+    used if the parser version, size and modification time of the file are
+    unchanged. If ``hash_contents`` is True the sha1 of the file's contents must
+    also match, which protects against edits that keep the size and mtime.
+    """
+    def __init__(self, directory, hash_contents=False):
+        self.directory = directory
+        self.hash_contents = hash_contents
+        try:
+            os.makedirs(directory)
+        except OSError as err:
+            if err.errno != errno.EEXIST:
+                raise
+
+    def load(self, cls, path, stats=None):
+        """Load the Section at path from the cache, parsing it on a miss.
+
+        stats: an optional ``anchor_txt.stats.Stats``, reading and
+          deserializing an entry is recorded as the read phase.
+        """
+        fingerprint = self.fingerprint(path)
+        entry_path = self._entry_path(path)
+
+        if stats is not None:
+            stats.start('read')
+        try:
+            entry = _read_entry(entry_path)
+            if entry is not None and entry.get('fingerprint') == fingerprint:
+                if stats is not None:
+                    stats.count('cache_hits')
+                return cls.from_dict(entry['section'])
+        finally:
+            if stats is not None:
+                stats.stop()
+
+        if stats is not None:
+            stats.count('cache_misses')
+        section = cls.from_md_path(path, stats=stats)
+        self._write_entry(entry_path, fingerprint, section)
+        return section
+
+    def fingerprint(self, path):
+        """Return the fingerprint used to validate the entry for path."""
+        stat = os.stat(path)
+        fingerprint = [CACHE_VERSION, stat.st_size, stat.st_mtime]
+        if self.hash_contents:
+            import hashlib
+            with open(path, 'rb') as fdesc:
+                fingerprint.append(hashlib.sha1(fdesc.read()).hexdigest())
+        return fingerprint
+
+    def _entry_path(self, path):
+        import hashlib
+        key = hashlib.sha1(os.path.abspath(path).encode('utf-8')).hexdigest()
+        return os.path.join(self.directory, key + '.json')
+
+    def _write_entry(self, entry_path, fingerprint, section):
+        import json
+        import tempfile
+        section_dict = section.to_dict()
+        try:
+            data = json.dumps({
+                'fingerprint': fingerprint,
+                'section': section_dict,
+            })
+        except (TypeError, ValueError):
+            # attributes which can't be represented in json (i.e. dates)
+            return
+        if not all(_string_keys(s.attributes) for s, _ in section.walk()):
+            # json turns the keys into strings (i.e. integer keys)
+            return
+
+        # write to a temporary file first so that readers never see a
+        # partially written entry.
+        fdesc, tmp_path = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+        try:
+            with os.fdopen(fdesc, 'w') as tmp:
+                tmp.write(data)
+            _replace(tmp_path, entry_path)
+        except Exception:
+            _remove(tmp_path)
+            raise
+
+
+def _string_keys(value):
+    """Return whether all mappings in value only have string keys."""
+    stack = [value]
+    while stack:
+        value = stack.pop()
+        if isinstance(value, dict):
+            if not all(isinstance(k, six.string_types) for k in value):
+                return False
+            stack.extend(value.values())
+        elif isinstance(value, list):
+            stack.extend(value)
+    return True
+
+
+def _replace(src, dst):
+    if six.PY2:
+        # os.replace is new in python 3.3 and os.rename can't overwrite an
+        # existing file on windows
+        _remove(dst)
+        os.rename(src, dst)
+    else:
+        os.replace(src, dst)  #pylint: disable=no-member
+
+
+def _remove(path):
+    try:
+        os.remove(path)
+    except OSError as err:
+        if err.errno != errno.ENOENT:
+            raise
+
+
+def _read_entry(entry_path):
+    import json
+    try:
+        with open(entry_path) as fdesc:
+            return json.load(fdesc)
+    except (IOError, OSError, ValueError):
+        return None
@@ -0,0 +1,166 @@
+# anchor_txt: attributes in markdown
+#
+# Copyright (C) 2019 Rett Berg <github.com/vitiral>
+#
+# The source code is Licensed under either of
+#
+# * Apache License, Version 2.0, ([LICENSE-APACHE](LICENSE-APACHE) or
+#   http://www.apache.org/licenses/LICENSE-2.0)
+# * MIT license ([LICENSE-MIT](LICENSE-MIT) or
+#   http://opensource.org/licenses/MIT)
+#
+# at your option.
+#
+# Unless you explicitly state otherwise, any contribution intentionally submitted
+# for inclusion in the work by you, as defined in the Apache-2.0 license, shall
+# be dual licensed as above, without any additional terms or conditions.
+"""Compare two versions of a section tree.
+
+Sections are matched by the anchor of their header. Sub-sections without an
+anchor are matched with an identical sub-section, or one with the same header
+text, falling back to their position. Sub-trees with the same
+``Section.fingerprint`` are skipped without being compared.
+"""
+from __future__ import unicode_literals
+
+import collections
+
+ADDED = 'added'
+REMOVED = 'removed'
+CHANGED = 'changed'
+
+
+class _Missing(object):
+    """The value of an attribute which does not exist."""
+    __slots__ = ()
+
+    def __repr__(self):
+        return 'MISSING'
+
+
+MISSING = _Missing()
+
+Change = collections.namedtuple('Change',
+                                ['kind', 'old', 'new', 'attributes'])
+Change.__doc__ = """A difference between two trees.
+
+``kind`` is ``ADDED``, ``REMOVED`` or ``CHANGED``. ``old`` and ``new`` are the
+Sections, ``old`` is None if it was added and ``new`` is None if it was
+removed. Added and removed sections include their sub-sections.
+
+A section is changed if its header, attributes or contents are different
+(changes to the sub-sections are separate Changes). ``attributes`` is
+``{key: (old_value, new_value)}`` of the attributes which are different, where
+a value is ``MISSING`` if the key does not exist.
+"""
+
+
+def diff(old, new):
+    """Return the list of Changes from the old to the new tree, in order."""
+    changes = []
+    stack = [(old, new)]
+    while stack:
+        old, new = stack.pop()
+        if old is None:
+            changes.append(Change(ADDED, None, new, {}))
+            continue
+        if new is None:
+            changes.append(Change(REMOVED, old, None, {}))
+            continue
+        if old.fingerprint == new.fingerprint:
+            continue
+        #pylint: disable=protected-access
+        if (old._fingerprint[0] != new._fingerprint[0]
+                and (old.header, old.attributes, old.contents) !=
+            (new.header, new.attributes, new.contents)):
+            changes.append(
+                Change(CHANGED, old, new,
+                       diff_attributes(old.attributes, new.attributes)))
+        stack.extend(reversed(_match(old.sections, new.sections)))
+    return changes
+
+
+def diff_attributes(old, new):
+    """Return ``{key: (old_value, new_value)}`` of the different attributes."""
+    changed = {}
+    for key, value in old.items():
+        new_value = new.get(key, MISSING)
+        if new_value != value:
+            changed[key] = (value, new_value)
+    for key, value in new.items():
+        if key not in old:
+            changed[key] = (MISSING, value)
+    return changed
+
+
+def to_dict(change):
+    """Convert a Change to a dict of json compatible values."""
+    section = change.old if change.new is None else change.new
+    attributes = {}
+    for key, (old, new) in change.attributes.items():
+        values = {}
+        if old is not MISSING:
+            values['old'] = old
+        if new is not MISSING:
+            values['new'] = new
+        attributes[key] = values
+    return {
+        "change": change.kind,
+        "anchor": section.header.anchor if section.header else None,
+        "header": section.header.text if section.header else None,
+        "attributes": attributes,
+    }
+
+
+def _match(old_sections, new_sections):
+    """Pair up sub-sections as ``(old, new)``, either can be None.
+
+    Sections without an anchor are paired with an identical section, then
+    with one with the same header text and only then by position, so that
+    inserting a section doesn't shift the others.
+    """
+    anchors = {}
+    for section in old_sections:
+        anchor = _anchor(section)
+        if anchor is not None:
+            anchors.setdefault(anchor, section)
+    others = []
+    for section in new_sections:
+        anchor = _anchor(section)
+        others.append(None if anchor is None else anchors.pop(anchor, None))
+    matched = set(id(other) for other in others if other is not None)
+
+    # the last key puts all sections in one group, pairing them in order
+    for key in (_fingerprint, _header_text, _position):
+        unmatched = collections.defaultdict(collections.deque)
+        for section in old_sections:
+            if _anchor(section) is None and id(section) not in matched:
+                unmatched[key(section)].append(section)
+        for i, section in enumerate(new_sections):
+            if others[i] is not None or _anchor(section) is not None:
+                continue
+            same = unmatched.get(key(section))
+            if same:
+                others[i] = same.popleft()
+                matched.add(id(others[i]))
+
+    pairs = list(zip(others, new_sections))
+    pairs.extend((section, None) for section in old_sections
+                 if id(section) not in matched)
+    return pairs
+
+
+def _anchor(section):
+    return section.header.anchor if section.header else None
+
+
+def _fingerprint(section):
+    return section.fingerprint
+
+
+def _header_text(section):
+    return tuple(section.header.text) if section.header else None
+
+
+def _position(_):
+    return None
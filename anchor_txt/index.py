@@ -0,0 +1,283 @@
+# anchor_txt: attributes in markdown
+#
+# Copyright (C) 2019 Rett Berg <github.com/vitiral>
+#
+# The source code is Licensed under either of
+#
+# * Apache License, Version 2.0, ([LICENSE-APACHE](LICENSE-APACHE) or
+#   http://www.apache.org/licenses/LICENSE-2.0)
+# * MIT license ([LICENSE-MIT](LICENSE-MIT) or
+#   http://opensource.org/licenses/MIT)
+#
+# at your option.
+#
+# Unless you explicitly state otherwise, any contribution intentionally submitted
+# for inclusion in the work by you, as defined in the Apache-2.0 license, shall
+# be dual licensed as above, without any additional terms or conditions.
+"""Indexes over the sections of many markdown files."""
+from __future__ import unicode_literals
+
+import collections
+
+import six
+
+from . import utils
+
+INDEX_VERSION = 1
+
+# attribute values which are indexed
+SCALAR_TYPES = (type(None), bool, float, six.text_type) + six.integer_types
+
+AnchorEntry = collections.namedtuple('AnchorEntry',
+                                     ['anchor', 'path', 'line', 'section'])
+AnchorEntry.__doc__ = """The location of an anchor.
+
+``line`` is the (1 based) line of the section's header. ``section`` is None
+for an index loaded from disk.
+"""
+
+SectionRef = collections.namedtuple('SectionRef', ['path', 'index'])
+SectionRef.__doc__ = """A section in an AttributeIndex.
+
+``index`` is the position of the section in ``root.spans()`` of the file.
+"""
+
+
+class AnchorIndex(object):
+    """An index of the header anchors in many files.
+
+    Built from ``(path, Section)`` pairs, i.e. the result of
+    ``Section.from_md_paths``. Looking up an anchor is a single dict lookup.
+    """
+    def __init__(self):
+        # anchor -> [AnchorEntry], more than one entry is a duplicate anchor
+        self._anchors = {}
+        # path -> [anchor]
+        self._files = {}
+
+    @classmethod
+    def from_sections(cls, sections):
+        """Create an index from an iterable of ``(path, Section)``."""
+        index = cls()
+        for path, section in sections:
+            index.add(path, section)
+        return index
+
+    def add(self, path, root):
+        """Add (or replace) the anchors of the file at path."""
+        self.remove(path)
+        anchors = []
+        for section, start, _ in root.spans():
+            if section.header is None or section.header.anchor is None:
+                continue
+            self._add_entry(
+                AnchorEntry(anchor=section.header.anchor,
+                            path=path,
+                            line=start + 1,
+                            section=section))
+            anchors.append(section.header.anchor)
+        self._files[path] = anchors
+
+    def remove(self, path):
+        """Remove the anchors of the file at path, if it is in the index."""
+        for anchor in self._files.pop(path, ()):
+            entries = self._anchors.get(anchor)
+            if entries is None:
+                continue
+            entries = [e for e in entries if e.path != path]
+            if entries:
+                self._anchors[anchor] = entries
+            else:
+                del self._anchors[anchor]
+
+    def get(self, anchor, default=None):
+        """Return the AnchorEntry of the anchor.
+
+        If the anchor is duplicated then the first one added is returned.
+        """
+        entries = self._anchors.get(anchor)
+        if entries is None:
+            return default
+        return entries[0]
+
+    def get_all(self, anchor):
+        """Return all AnchorEntry of the anchor."""
+        return list(self._anchors.get(anchor, ()))
+
+    def duplicates(self):
+        """Return ``{anchor: [AnchorEntry]}`` of anchors defined more than once."""
+        return {
+            anchor: list(entries)
+            for anchor, entries in self._anchors.items() if len(entries) > 1
+        }
+
+    def paths(self):
+        """Return the paths of the files in the index."""
+        return list(self._files)
+
+    def dump(self, fileobj):
+        """Serialize the index as json to an open file."""
+        import json
+        json.dump(
+            {
+                'version': INDEX_VERSION,
+                'files': {
+                    path: [[e.anchor, e.line] for e in self._file_entries(path)]
+                    for path in self._files
+                },
+            }, fileobj)
+
+    #pylint: disable=protected-access
+    @classmethod
+    def load(cls, fileobj):
+        """Deserialize an index written by ``dump``.
+
+        The ``section`` of every entry is None.
+        """
+        import json
+        data = json.load(fileobj)
+        if data.get('version') != INDEX_VERSION:
+            raise ValueError("Unsupported index version: {}".format(
+                data.get('version')))
+        index = cls()
+        for path, entries in data['files'].items():
+            index._files[path] = [anchor for anchor, _ in entries]
+            for anchor, line in entries:
+                index._add_entry(
+                    AnchorEntry(anchor=anchor,
+                                path=path,
+                                line=line,
+                                section=None))
+        return index
+
+    def _add_entry(self, entry):
+        entries = self._anchors.get(entry.anchor)
+        if entries is None:
+            self._anchors[entry.anchor] = [entry]
+        else:
+            entries.append(entry)
+
+    def _file_entries(self, path):
+        seen = set()
+        for anchor in self._files[path]:
+            if anchor in seen:
+                continue
+            seen.add(anchor)
+            for entry in self._anchors[anchor]:
+                if entry.path == path:
+                    yield entry
+
+    def __contains__(self, anchor):
+        return anchor in self._anchors
+
+    def __len__(self):
+        return len(self._anchors)
+
+
+class AttributeIndex(object):
+    """An inverted index of the attributes of the sections in many files.
+
+    Built from ``(path, Section)`` pairs, i.e. the result of
+    ``Section.from_md_paths``. Sections can be queried by attribute key and by
+    scalar (None, bool, number or string) value.
+
+    Queries return a frozenset of SectionRef, which are combined with ``&``
+    (AND) and ``|`` (OR) and converted to Sections with ``sections``. Values
+    match with their type, so ``1`` matches neither ``True`` nor ``1.0``.
+    """
+    def __init__(self):
+        # key -> set(SectionRef)
+        self._keys = {}
+        # (key, type, value) -> set(SectionRef)
+        self._values = {}
+        # path -> [Section]
+        self._files = {}
+        # path -> [(SectionRef, key, value_key)] of what was indexed, the
+        # attributes of the sections may have changed since.
+        self._indexed = {}
+
+    @classmethod
+    def from_sections(cls, sections):
+        """Create an index from an iterable of ``(path, Section)``."""
+        index = cls()
+        for path, section in sections:
+            index.add(path, section)
+        return index
+
+    def add(self, path, root):
+        """Add (or replace) the sections of the file at path."""
+        self.remove(path)
+        sections = [span[0] for span in root.spans()]
+        self._files[path] = sections
+        indexed = []
+        for i, section in enumerate(sections):
+            ref = SectionRef(path, i)
+            for key, value in section.attributes.items():
+                _index_add(self._keys, key, ref)
+                value_key = _value_key(key, value)
+                if value_key is not None:
+                    _index_add(self._values, value_key, ref)
+                indexed.append((ref, key, value_key))
+        self._indexed[path] = indexed
+
+    def remove(self, path):
+        """Remove the sections of the file at path, if it is in the index."""
+        self._files.pop(path, None)
+        for ref, key, value_key in self._indexed.pop(path, ()):
+            _index_discard(self._keys, key, ref)
+            if value_key is not None:
+                _index_discard(self._values, value_key, ref)
+
+    def has_key(self, key):
+        """Query the sections which have the attribute key."""
+        return frozenset(self._keys.get(key, ()))
+
+    def equals(self, key, value):
+        """Query the sections where the attribute key equals the scalar value."""
+        value_key = _value_key(key, utils.to_unicode(value))
+        if value_key is None:
+            raise TypeError("Only scalar values are indexed: {}".format(
+                repr(value)))
+        return frozenset(self._values.get(value_key, ()))
+
+    def in_set(self, key, values):
+        """Query the sections where the attribute key equals any of the values."""
+        found = set()
+        for value in values:
+            found.update(self.equals(key, value))
+        return frozenset(found)
+
+    def section(self, ref):
+        """Return the Section of a SectionRef."""
+        return self._files[ref.path][ref.index]
+
+    def sections(self, refs):
+        """Return the Sections of the SectionRefs, in order of path and index."""
+        return [self.section(ref) for ref in sorted(refs)]
+
+    def paths(self):
+        """Return the paths of the files in the index."""
+        return list(self._files)
+
+
+def _value_key(key, value):
+    if not isinstance(value, SCALAR_TYPES):
+        return None
+    return (key, type(value), value)
+
+
+def _index_add(index, key, ref):
+    refs = index.get(key)
+    if refs is None:
+        index[key] = set([ref])
+    else:
+        refs.add(ref)
+
+
+def _index_discard(index, key, ref):
+    refs = index.get(key)
+    if refs is None:
+        return
+    refs.discard(ref)
+    if not refs:
+        del index[key]
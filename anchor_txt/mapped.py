@@ -0,0 +1,125 @@
+# anchor_txt: attributes in markdown
+#
+# Copyright (C) 2019 Rett Berg <github.com/vitiral>
+#
+# The source code is Licensed under either of
+#
+# * Apache License, Version 2.0, ([LICENSE-APACHE](LICENSE-APACHE) or
+#   http://www.apache.org/licenses/LICENSE-2.0)
+# * MIT license ([LICENSE-MIT](LICENSE-MIT) or
+#   http://opensource.org/licenses/MIT)
+#
+# at your option.
+#
+# Unless you explicitly state otherwise, any contribution intentionally submitted
+# for inclusion in the work by you, as defined in the Apache-2.0 license, shall
+# be dual licensed as above, without any additional terms or conditions.
+"""Memory mapped markdown files.
+
+The file is scanned once for headers and code fences. Every section only
+stores the byte offsets of its lines in the map, which are decoded when the
+section's contents are first accessed. This allows holding very large
+documents at roughly the cost of the file itself.
+"""
+from __future__ import unicode_literals
+
+import mmap
+
+from . import mdsplit
+
+_NEWLINE = b'\n'
+_HASH = b'#'
+_BACKTICK = b'`'
+
+
+class MappedFile(object):
+    """A read only memory map of a (utf-8) markdown file."""
+    def __init__(self, path):
+        with open(path, 'rb') as fdesc:
+            try:
+                self.buffer = mmap.mmap(fdesc.fileno(),
+                                        0,
+                                        access=mmap.ACCESS_READ)
+            except ValueError:
+                # empty files can't be mapped
+                self.buffer = b''
+
+    def decode(self, start, end):
+        """Decode the bytes ``[start, end)`` of the file."""
+        return self.buffer[start:end].decode('utf-8')
+
+    def split_headers(self):
+        """Like ``mdsplit.split_headers`` but yield ``MappedLines``.
+
+        Only header and fence lines are decoded.
+        """
+        buf = self.buffer
+        size = len(buf)
+        header = None
+        # start of the body and the number of lines in it
+        body_start = 0
+        body_count = 0
+        in_fence = False
+
+        pos = 0
+        while True:
+            end = buf.find(_NEWLINE, pos)
+            if end == -1:
+                end = size
+            first = buf[pos:pos + 1]
+
+            if first == _BACKTICK:
+                if mdsplit.FENCE_RE.match(self._line(pos, end)):
+                    in_fence = not in_fence
+            elif first == _HASH and not in_fence:
+                new_header = mdsplit.parse_header(self._line(pos, end))
+                if header is not None and not body_count and \
+                        header.level == new_header.level:
+                    header.merge(new_header)
+                else:
+                    # the body ends before the newline of the previous line
+                    body_end = pos - 1
+                    if buf[body_end - 1:body_end] == b'\r':
+                        body_end -= 1
+                    yield header, MappedLines(self, body_start, body_end,
+                                              body_count)
+                    header = new_header
+                body_start = end + 1
+                body_count = 0
+                if end == size:
+                    break
+                pos = end + 1
+                continue
+
+            body_count += 1
+            if end == size:
+                break
+            pos = end + 1
+
+        yield header, MappedLines(self, body_start, size, body_count)
+
+    def _line(self, start, end):
+        line = self.decode(start, end)
+        if line.endswith('\r'):
+            line = line[:-1]
+        return line
+
+
+class MappedLines(object):
+    """The lines of a section in a MappedFile, decoded when iterated."""
+    __slots__ = ('mapped', 'start', 'end', 'count')
+
+    def __init__(self, mapped, start, end, count):
+        self.mapped = mapped
+        self.start = start
+        self.end = end
+        self.count = count
+
+    def __len__(self):
+        return self.count
+
+    def __iter__(self):
+        if not self.count:
+            return iter(())
+        text = self.mapped.decode(self.start, self.end)
+        return iter(text.replace('\r\n', '\n').split('\n'))
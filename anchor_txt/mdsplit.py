@@ -19,6 +19,7 @@
 from __future__ import unicode_literals
 import re
 import six
+from six import PY2
 from . import utils
 
 KEY_TEXT = "text"
@@ -53,103 +54,327 @@ BLOCK_MAYBE_RE = re.compile(r'    [^ ].*$')
 
 ATTR_IDENTIFIER_RE = re.compile(r"^(yaml|json) .*@$")
 
+# the start of an inline attribute, i.e. ``\`@{a: 1}\```
+ATTR_INLINE_MARKER = "`@{"
+
 
-# pylint: disable=too-many-branches
 def split(md_text):
     """Split the markdown text into its components."""
-    lines = md_text.split('\n')
+    return list(split_iter(md_text.split('\n')))
+
+
+def split_stream(fileobj):
+    """Split an open markdown file into its components.
+
+    Components are yielded as they are completed, see ``split_iter``.
+    """
+    return split_iter(iter_lines(fileobj))
+
+
+def iter_lines(fileobj):
+    """Iterate over the lines of an open file, without their newlines.
+
+    This yields the same lines as ``fileobj.read().split('\\n')``.
+    """
+    line = '\n'
+    for line in fileobj:
+        yield line[:-1] if line.endswith('\n') else line
+    if line.endswith('\n'):
+        yield ''
+
 
-    components = []
+# The first characters of lines which can be something other than text.
+_SPECIAL_FIRST = frozenset([' ', '`', '#', '['])
+
+
+def _is_indented_block(line):
+    """Equivalent to ``BLOCK_MAYBE_RE.match(line)``."""
+    return line[:4] == '    ' and line[4:5] not in ('', ' ')
+
+
+def _is_empty(line):
+    """Equivalent to ``EMPTY_RE.match(line)``."""
+    return not line or (line[0].isspace() and EMPTY_RE.match(line))
+
+
+# pylint: disable=too-many-branches,too-many-statements
+def split_iter(lines):
+    """Split an iterable of markdown lines into its components.
+
+    Each component is yielded as soon as it is complete, so only the component
+    currently being built is held in memory.
+
+    Every line is classified by its first character, so that at most one
+    regular expression is matched against it: headers start with ``#``,
+    fences with a backtick, reference links with ``[`` and indented code or
+    empty lines with whitespace. Everything else is text.
+    """
+    # The last component, which can still be extended by the following lines.
+    last = None
+    # last.raw if the last component is Text, else None
+    text_raw = None
 
     code_builder = None
 
-    for line in lines:
-        line = utils.to_unicode(line)
-        # Code indented
-        mat = BLOCK_MAYBE_RE.match(line)
-        if (mat and not code_builder and components
-                and isinstance(components[-1], Text)
-                and components[-1].raw[-1] == ""):
-            code_builder = CodeBuilder(line, True, None)
-            continue
+    if PY2:
+        lines = (utils.to_unicode(line) for line in lines)
 
-        if code_builder and code_builder.is_indented:
-            if mat or EMPTY_RE.match(line):
-                # append an indented or empty line
-                code_builder.append(line)
-                continue
-            else:
-                components.append(code_builder.build())
-                code_builder = None
-                # don't continue, let other lexers look at line
-
-        # Code fence (```)
-        mat = FENCE_RE.match(line)
-        if mat:
-            if code_builder:
-                # we already have a code builder, so this must be ending the code section
-                code_builder.append_raw(line)
-                components.append(code_builder.build())
+    for line in lines:
+        first = line[:1]
+
+        if code_builder is not None:
+            if code_builder.is_indented:
+                if ((first == ' ' and _is_indented_block(line))
+                        or _is_empty(line)):
+                    # append an indented or empty line
+                    code_builder.append(line)
+                    continue
+                if last is not None:
+                    yield last
+                last = code_builder.build()
+                text_raw = None
                 code_builder = None
+                # don't continue, let the other lexers look at line
             else:
-                code_builder = CodeBuilder(
-                    line, False,
-                    mat.groupdict()[KEY_CODE_IDENTIFIER])
-            continue
+                if first == '`' and FENCE_RE.match(line):
+                    # this must be ending the code section
+                    code_builder.append_raw(line)
+                    if last is not None:
+                        yield last
+                    last = code_builder.build()
+                    text_raw = None
+                    code_builder = None
+                else:
+                    # inlined CodeBuilder.append for fenced code
+                    code_builder.raw_lines.append(line)
+                    code_builder.text.append(line)
+                continue
 
-        if code_builder:
-            code_builder.append(line)
-            continue
+        if first not in _SPECIAL_FIRST:
+            # by far the most common case: a line of text
+            pass
 
-        # Headers
-        mat = HEADER_RE.match(line)
-        if mat:
-            groups = mat.groupdict()
+        elif first == ' ':
+            # Code indented
+            if (text_raw is not None and text_raw[-1] == ""
+                    and _is_indented_block(line)):
+                code_builder = CodeBuilder(line, True, None)
+                continue
 
-            header = Header(
-                raw=[mat.group(0)],
-                level=len(groups[KEY_LEVEL]),
-                anchor=groups[KEY_ANCHOR] or groups[KEY_ANCHOR_HTML],
-                text=[groups[KEY_TEXT]],
-            )
+        elif first == '`':
+            # Code fence (```)
+            mat = FENCE_RE.match(line)
+            if mat:
+                code_builder = CodeBuilder(
+                    line, False,
+                    mat.groupdict()[KEY_CODE_IDENTIFIER])
+                continue
 
-            if (components and isinstance(components[-1], Header)
-                    and components[-1].level == header.level):
+        elif first == '#':
+            # Headers
+            header = parse_header(line)
+            if isinstance(last, Header) and last.level == header.level:
                 # If the last line was a header of the same level, merge them
-                components[-1].text.extend(header.text)
-                components[-1].raw.extend(header.raw)
-                if header.anchor is not None:
-                    components[-1].anchor = header.anchor
+                last.merge(header)
             else:
-                components.append(header)
+                if last is not None:
+                    yield last
+                last = header
+                text_raw = None
             continue
 
-        # ReferenceLink
-        mat = REFERENCE_LINK_RE.match(line)
-        if mat:
-            components.append(
-                ReferenceLink(
+        elif first == '[':
+            # ReferenceLink
+            mat = REFERENCE_LINK_RE.match(line)
+            if mat:
+                if last is not None:
+                    yield last
+                last = ReferenceLink(
                     raw=[line],
                     reference=mat.group(1),
                     link=mat.group(2),
-                ))
-            continue
+                )
+                text_raw = None
+                continue
 
-        if components and isinstance(components[-1], Text):
-            components[-1].append(line)
+        if text_raw is not None:
+            text_raw.append(line)
         else:
-            components.append(Text([line]))
+            if last is not None:
+                yield last
+            last = Text([line])
+            text_raw = last.raw
+
+    if last is not None:
+        yield last
+    if code_builder is not None:
+        yield code_builder.build()
+
+
+# pylint: disable=too-many-branches,too-many-statements
+def split_attributes(lines):
+    """Split an iterable of markdown lines into only what has attributes.
+
+    Yields ``(line_num, component)`` of every Header, every Code block with an
+    ``attribute_format`` and a single line Text for every line of text which
+    contains ``ATTR_INLINE_MARKER``. Everything else is skipped without being
+    stored, but the lines are classified exactly like ``split_iter`` so the
+    same attributes are found.
+    """
+    # the header which can still be merged with the next line
+    header = None
+    header_line = fence_line = 0
+    # whether the last component is Text, and whether its last line is empty
+    in_text = False
+    text_empty = False
+    # the CodeBuilder of an attribute block, or True for any other fence
+    fence = None
+    indented = False
+
+    if PY2:
+        lines = (utils.to_unicode(line) for line in lines)
+
+    for line_num, line in enumerate(lines, 1):
+        first = line[:1]
+
+        if fence is not None:
+            if first == '`' and FENCE_RE.match(line):
+                if fence is not True:
+                    fence.append_raw(line)
+                    yield fence_line, fence.build()
+                fence = None
+            elif fence is not True:
+                fence.append(line)
+            continue
+
+        if indented:
+            if (first == ' ' and _is_indented_block(line)) or _is_empty(line):
+                continue
+            indented = False
+
+        if first not in _SPECIAL_FIRST:
+            # by far the most common case: a line of text
+            if header is not None:
+                yield header_line, header
+                header = None
+            if ATTR_INLINE_MARKER in line:
+                yield line_num, Text([line])
+            in_text = True
+            text_empty = not line
+            continue
 
-    if code_builder:
-        components.append(code_builder.build())
+        if first == '#':
+            new_header = parse_header(line)
+            if header is not None and header.level == new_header.level:
+                header.merge(new_header)
+            else:
+                if header is not None:
+                    yield header_line, header
+                header = new_header
+                header_line = line_num
+            in_text = False
+            continue
 
-    return components
+        if header is not None:
+            # any other line completes the header
+            yield header_line, header
+            header = None
 
+        if first == ' ':
+            if in_text and text_empty and _is_indented_block(line):
+                indented = True
+                in_text = False
+                continue
+        elif first == '`':
+            mat = FENCE_RE.match(line)
+            if mat:
+                identifier = mat.groupdict()[KEY_CODE_IDENTIFIER]
+                fence = True
+                if identifier and ATTR_IDENTIFIER_RE.match(identifier):
+                    fence = CodeBuilder(line, False, identifier)
+                    fence_line = line_num
+                in_text = False
+                continue
+        elif first == '[':
+            if REFERENCE_LINK_RE.match(line):
+                in_text = False
+                continue
 
-class Header:
+        # a line of text
+        if ATTR_INLINE_MARKER in line:
+            yield line_num, Text([line])
+        in_text = True
+        text_empty = line == ""
+
+    if header is not None:
+        yield header_line, header
+    if fence is not None and fence is not True:
+        yield fence_line, fence.build()
+
+
+def split_headers(lines):
+    """Split an iterable of markdown lines at its headers.
+
+    Yields ``(header, lines)`` for every header, where ``lines`` are the lines
+    up to the next header. The first item is ``(None, lines)`` for the lines
+    before the first header.
+
+    This only lexes headers and code fences, which is much faster than
+    ``split_iter``. Passing the ``lines`` of each item to ``split_iter`` gives
+    the same components as splitting the whole document.
+    """
+    header = None
+    body = []
+    in_fence = False
+
+    if PY2:
+        lines = (utils.to_unicode(line) for line in lines)
+
+    for line in lines:
+        first = line[:1]
+        if first == '`':
+            if FENCE_RE.match(line):
+                in_fence = not in_fence
+        elif first == '#' and not in_fence:
+            new_header = parse_header(line)
+            if header is not None and not body and \
+                    header.level == new_header.level:
+                header.merge(new_header)
+            else:
+                yield header, body
+                header = new_header
+                body = []
+            continue
+        body.append(line)
+
+    yield header, body
+
+
+def parse_header(line):
+    """Parse a line starting with ``#`` into a Header."""
+    mat = HEADER_RE.match(line)
+    groups = mat.groupdict()
+    return Header(
+        raw=[mat.group(0)],
+        level=len(groups[KEY_LEVEL]),
+        anchor=groups[KEY_ANCHOR] or groups[KEY_ANCHOR_HTML],
+        text=[groups[KEY_TEXT]],
+    )
+
+
+def is_open_fence(code):
+    """Return whether the Code is a fenced block which was never closed."""
+    if not FENCE_RE.match(code.raw[0]):
+        return False
+    return len(code.raw) == 1 or not FENCE_RE.match(code.raw[-1])
+
+
+class Header(object):
     """A header in markdown, i.e. ``# header``"""
     TYPE = "HEADER"
 
+    __slots__ = ('raw', 'level', 'anchor', 'text')
+
     def __init__(self, raw, level, anchor, text):
         assert isinstance(raw, list)
         assert isinstance(level, int)
@@ -161,6 +386,19 @@ class Header:
         self.anchor = anchor
         self.text = text
 
+    # pickle as the constructor arguments, this is much smaller and faster
+    # than the default for slots, see ``Section.from_md_parallel``.
+    def __reduce__(self):
+        return (self.__class__, (self.raw, self.level, self.anchor, self.text))
+
+    def merge(self, other):
+        """Merge a header of the same level on the following line into this one."""
+        assert other.level == self.level
+        self.text.extend(other.text)
+        self.raw.extend(other.raw)
+        if other.anchor is not None:
+            self.anchor = other.anchor
+
     def to_dict(self):
         """serialize."""
         return {
@@ -189,15 +427,20 @@ class Header:
                           self.__class__) and self._tuple() == other._tuple()
 
 
-class ReferenceLink:
+class ReferenceLink(object):
     """A reference link line, i.e. `[foo]: http://foo.com`"""
     TYPE = "REFERENCE_LINK"
 
+    __slots__ = ('raw', 'reference', 'link')
+
     def __init__(self, raw, reference, link):
         self.raw = raw
         self.reference = reference
         self.link = link
 
+    def __reduce__(self):
+        return (self.__class__, (self.raw, self.reference, self.link))
+
     @classmethod
     def from_parts(cls, reference, link):
         """Convert from parts"""
@@ -232,10 +475,12 @@ class ReferenceLink:
         return (self.raw, self.reference, self.link)
 
 
-class Code:
+class Code(object):
     """A code block in markdown, either fenced or indented."""
     TYPE = "CODE"
 
+    __slots__ = ('raw', 'identifier', 'text', 'attribute_format')
+
     def __init__(self, raw, identifier, text):
         self.raw = raw
         self.identifier = identifier
@@ -246,6 +491,9 @@ class Code:
         if attr_fmt is not None:
             self.attribute_format = attr_fmt.group(1)
 
+    def __reduce__(self):
+        return (self.__class__, (self.raw, self.identifier, self.text))
+
     def to_dict(self):
         """serialize."""
         return {
@@ -273,8 +521,9 @@ class Code:
         return list(self.raw)
 
 
-class CodeBuilder:
+class CodeBuilder(object):
     """Builder for creating a code block when parsing."""
+    __slots__ = ('is_indented', 'identifier', 'raw_lines', 'text')
     def __init__(self, raw_start, is_indented, identifier):
         self.is_indented = is_indented
         self.identifier = identifier
@@ -302,13 +551,15 @@ class CodeBuilder:
                     text=self.text)
 
 
-class Text:
+class Text(object):
     """A text block in markdown.
 
     This is anything that isn't either a header or code.
     """
     TYPE = "TEXT"
 
+    __slots__ = ('raw', )
+
     def __init__(self, raw=None):
         if raw is None:
             raw = []
@@ -316,6 +567,9 @@ class Text:
         assert isinstance(raw, list)
         self.raw = raw
 
+    def __reduce__(self):
+        return (self.__class__, (self.raw, ))
+
     def append(self, line):
         """Append a line."""
         self.raw.append(line)
@@ -344,7 +598,8 @@ class Text:
 
 
 def from_dict(dct):
-    """Attempt to deserialize an arbitrary dictionry to either Code, Header or Text."""
+    """Attempt to deserialize an arbitrary dictionry to either Code, Header,
+    ReferenceLink or Text."""
     if dct['type'] == 'TEXT':
         return Text(raw=dct['raw'])
     if dct['type'] == 'HEADER':
@@ -356,5 +611,9 @@ def from_dict(dct):
         return Code(raw=dct['raw'],
                     text=dct['text'],
                     identifier=dct['identifier'])
+    if dct['type'] == 'REFERENCE_LINK':
+        return ReferenceLink(raw=dct['raw'],
+                             reference=dct['reference'],
+                             link=dct['link'])
 
     raise TypeError("Invalid dct: {}".format(dct))
@@ -20,19 +20,43 @@ Section object
 from __future__ import unicode_literals
 # Splits the file and pull out attributes and sections
 
+import os
 import re
-import six
+import gc
+import bisect
 
-import yaml
+try:
+    from collections.abc import Mapping
+except ImportError:
+    # python 2
+    from collections import Mapping
 
 from . import utils
 from . import mdsplit
+from . import attributes as attrs
+from .mapped import MappedFile
+from .stats import Stats
 
 ATTR_IDENTIFIER_RE = re.compile(r"^yaml .*@$")
 ATTR_INLINE_RE = re.compile(r"`@{(.*?)}`")
+ATTR_INLINE_MARKER = mdsplit.ATTR_INLINE_MARKER
 
+# Used to split documents for ``Section.from_md_parallel``. These match the
+# newline before the line, which is much faster than ``re.MULTILINE``.
+FENCE_LINE_RE = re.compile(r"\n```[^`\n]*(?![^\n])")
+HEADER_LINE_RE = re.compile(r"\n#")
 
-class Section:
+# number of chunks per worker of ``Section.from_md_parallel``
+CHUNKS_PER_WORKER = 4
+
+# the cli only splits single files larger than this between processes
+PARALLEL_MIN_BYTES = 16 * 1024 * 1024
+
+# number of lines joined into each write of ``Section.write_to``
+WRITE_BATCH = 1024
+
+
+class Section(object):
     """A section of markdown.
 
     This is either:
@@ -42,120 +66,889 @@ class Section:
 
     TYPE = 'SECTION'
 
+    __slots__ = ('parent', 'header', 'sections', '_attributes', '_contents',
+                 '_source', '_effective', '_fingerprint')
+
     #pylint: disable=too-many-arguments
     def __init__(self, parent, header, attributes, sections, contents):
         self.parent = parent
         self.header = header
-        self.attributes = attributes
         self.sections = sections
-        self.contents = contents
+        self._attributes = attributes
+        self._contents = contents
+        # (lines, line_num) of a lazy section which has not been parsed yet.
+        self._source = None
+        # the memoized EffectiveAttributes
+        self._effective = None
+        # the memoized (own, tree) sha1 hexdigests, see ``fingerprint``
+        self._fingerprint = None
+
+    @property
+    def attributes(self):
+        """The attributes of the section, as a dict."""
+        if self._source is not None:
+            self._materialize()
+        return self._attributes
+
+    @attributes.setter
+    def attributes(self, value):
+        if self._source is not None:
+            self._materialize()
+        self._attributes = value
+        self.invalidate_effective_attributes()
+        self.invalidate_fingerprint()
+
+    @property
+    def effective_attributes(self):
+        """The attributes of the section merged with those of its parents.
+
+        A read only mapping where the attributes of a section override those
+        of its parents. It is created once per section and shares the
+        parent's mapping instead of copying it, so changes to the attribute
+        dicts are always visible. Call ``invalidate_effective_attributes`` if
+        ``parent`` or ``sections`` are changed by hand.
+        """
+        if self._effective is None:
+            _create_effective(self)
+        return self._effective
+
+    def invalidate_effective_attributes(self):
+        """Forget the ``effective_attributes`` of this section and its
+        sub-sections."""
+        stack = [self]
+        while stack:
+            section = stack.pop()
+            if section._effective is None:
+                # sub-sections are only memoized after their parent
+                continue
+            section._effective = None
+            stack.extend(section.sections)
+
+    @property
+    def contents(self):
+        """The components of the section, excluding the header and sections."""
+        if self._source is not None:
+            self._materialize()
+        return self._contents
+
+    @contents.setter
+    def contents(self, value):
+        if self._source is not None:
+            self._materialize()
+        self._contents = value
+        self.invalidate_fingerprint()
+
+    @property
+    def fingerprint(self):
+        """A hex sha1 of the section and its sub-sections.
+
+        It hashes the header, attributes and contents of the section together
+        with the fingerprints of the sub-sections (a merkle tree), so equal
+        fingerprints mean equal trees. It is memoized, call
+        ``invalidate_fingerprint`` if the section is changed by hand other
+        than by setting ``attributes`` or ``contents``.
+        """
+        if self._fingerprint is None:
+            _create_fingerprint(self)
+        return self._fingerprint[1]
+
+    def invalidate_fingerprint(self):
+        """Forget the ``fingerprint`` of this section and its parents."""
+        section = self
+        while section is not None:
+            section._fingerprint = None
+            section = section.parent
 
     def is_root(self):
         """Return whether this is the root/document Section."""
         return self.header is None
 
+    def is_loaded(self):
+        """Return whether the contents and attributes have been parsed.
+
+        This is only False for sections created with ``lazy=True`` which have
+        not been accessed yet.
+        """
+        return self._source is None
+
     @classmethod
-    def from_md(cls, md_text):
-        """Convert a markdown file to a Section."""
-        components = mdsplit.split(md_text)
-        root = _create_new_section(cls, None, None)
-        current_section = root
+    def from_md(cls, md_text, lazy=False, stats=None, attributes_only=False):
+        """Convert a markdown file to a Section.
+
+        lazy: if True, only the headers are parsed up front. The contents and
+          attributes of each section are parsed the first time they are
+          accessed.
+        stats: an optional ``anchor_txt.stats.Stats`` which records the time
+          spent in each phase of parsing. Lazy sections don't record the time
+          spent when they are accessed.
+        attributes_only: if True, only the headers and attributes are parsed
+          and the contents of every section are left empty. Only the lines
+          which can contain attributes are looked at closely, see
+          ``mdsplit.split_attributes``. Can't be combined with lazy.
+        """
+        if stats is None:
+            return _parse(cls, md_text.split('\n'), lazy, None,
+                          attributes_only)
+        with stats.timed('split'):
+            lines = md_text.split('\n')
+        stats.count('lines', len(lines))
+        return _parse(cls, lines, lazy, stats, attributes_only)
+
+    @classmethod
+    def from_md_parallel(cls, md_text, workers=None):
+        """Convert a large markdown file to a Section using many processes.
+
+        The document is split at headers outside of code fences into about
+        ``CHUNKS_PER_WORKER`` chunks per worker, which are parsed in a
+        ``multiprocessing.Pool``. The sections of every chunk are then added
+        to a single tree by their header level. The result is identical to
+        ``from_md``.
 
-        # Loop through the components, adding them to the correct section
-        # and storing attributes.
-        for cmt in components:
-            if isinstance(cmt, mdsplit.Header):
-                if current_section.is_root(
-                ) or cmt.level < current_section.header.level:
-                    parent = current_section
+        workers: the number of processes, default is #cpus.
+        """
+        import multiprocessing
+        if workers is None:
+            workers = multiprocessing.cpu_count()
+        if workers <= 1:
+            return cls.from_md(md_text)
+        jobs = [(cls, text, line_num) for text, line_num in _chunk_text(
+            md_text, workers * CHUNKS_PER_WORKER)]
+        if len(jobs) == 1:
+            return cls.from_md(md_text)
+
+        # Unpickling the sections creates many objects at once, which would
+        # trigger full garbage collections over and over.
+        gc_enabled = gc.isenabled()
+        gc.disable()
+        pool = multiprocessing.Pool(min(workers, len(jobs)))
+        try:
+            root = None
+            last = None
+            for flat in pool.imap(_parse_chunk, jobs):
+                if root is None:
+                    _, attributes, contents = flat[0]
+                    root = last = cls(None, None, attributes, [], contents)
                 else:
-                    parent = current_section.parent
+                    # every chunk after the first starts with a header
+                    assert not flat[0][2]
+                for header, attributes, contents in flat[1:]:
+                    section = cls(None, header, attributes, [], contents)
+                    _append_section(last, section)
+                    last = section
+            pool.close()
+        finally:
+            pool.terminate()
+            pool.join()
+            if gc_enabled:
+                gc.enable()
+        return root
+
+    @classmethod
+    def from_md_stream(cls, fileobj, lazy=False, stats=None,
+                       attributes_only=False):
+        """Convert an open markdown file to a Section.
+
+        The file is read line by line, so the text of the file is never held
+        in memory all at once.
 
+        lazy, stats, attributes_only: see ``from_md``. With stats reading
+          each line is timed separately from splitting it.
+        """
+        lines = mdsplit.iter_lines(fileobj)
+        if stats is not None:
+            lines = stats.timed_iter('read', lines, 'lines')
+        return _parse(cls, lines, lazy, stats, attributes_only)
+
+    @classmethod
+    def from_components(cls, components, stats=None):
+        """Convert an iterable of components from ``mdsplit`` to a Section.
+
+        stats: see ``from_md``.
+        """
+        root = _create_new_section(cls, None, None)
+        _build(root, components, 1, stats)
+        return root
+
+    #pylint: disable=protected-access
+    @classmethod
+    def from_headers(cls, headers):
+        """Convert the output of ``mdsplit.split_headers`` to a lazy Section.
+
+        The lines of each section are only split and their attributes decoded
+        when the section's ``contents`` or ``attributes`` are accessed.
+        """
+        root = _create_new_section(cls, None, None)
+        current_section = root
+        line_num = 1
+        for header, lines in headers:
+            if header is not None:
                 new_section = _create_new_section(cls,
-                                                  parent=parent,
-                                                  header=cmt)
+                                                  parent=None,
+                                                  header=header)
                 _append_section(current_section, new_section)
                 current_section = new_section
-            elif isinstance(cmt, mdsplit.ReferenceLink):
-                current_section.contents.append(cmt)
-            elif isinstance(cmt, mdsplit.Code):
-                if cmt.attribute_format:
-                    code_txt = '\n'.join(cmt.text)
-                    _update_attributes(current_section,
-                                       yaml.safe_load(code_txt))
-                current_section.contents.append(cmt)
-            else:
-                assert isinstance(cmt, mdsplit.Text)
-                for line in cmt.raw:
-                    for match in ATTR_INLINE_RE.finditer(line):
-                        value = utils.to_unicode(yaml.safe_load(
-                            match.group(1)))
-                        if isinstance(value, six.text_type):
-                            value = {value: None}
-                        _update_attributes(current_section, value)
-
-                current_section.contents.append(cmt)
-
+                line_num += len(header.raw)
+            if lines:
+                current_section._source = (lines, line_num)
+            line_num += len(lines)
         return root
 
+    def _materialize(self):
+        """Parse the contents and attributes of a lazy section."""
+        lines, line_num = self._source
+        self._source = None
+        try:
+            _build(self, mdsplit.split_iter(lines), line_num)
+        except Exception:
+            self._source = (lines, line_num)
+            self._attributes = {}
+            self._contents = []
+            raise
+
     @classmethod
-    def from_md_path(cls, path):
-        """Convert a markdown file at a path to a Section."""
+    def from_md_path(cls,
+                     path,
+                     cache=None,
+                     lazy=False,
+                     mmap=False,
+                     stats=None,
+                     attributes_only=False):
+        """Convert a markdown file at a path to a Section.
+
+        cache: an optional ``anchor_txt.cache.ParseCache``, used to skip parsing
+          files which have not changed. Sections loaded from the cache are
+          never lazy.
+        lazy: see ``from_md``.
+        mmap: if True, memory map the (utf-8) file and load it lazily. Sections
+          only store the offsets of their lines in the map until they are
+          accessed, see ``anchor_txt.mapped``.
+        stats: see ``from_md``.
+        attributes_only: see ``from_md``. Can't be combined with cache, lazy
+          or mmap.
+        """
+        if attributes_only and (cache is not None or mmap):
+            raise ValueError(
+                "attributes_only can't be combined with cache or mmap")
+        if cache is not None:
+            return cache.load(cls, path, stats=stats)
+        if mmap:
+            if stats is None:
+                return cls.from_headers(MappedFile(path).split_headers())
+            with stats.timed('read'):
+                mapped = MappedFile(path)
+            stats.count('files')
+            stats.count('bytes', len(mapped.buffer))
+            with stats.timed('build'):
+                return cls.from_headers(
+                    stats.timed_iter('split', mapped.split_headers()))
         with open(path) as fdesc:
-            return cls.from_md(fdesc.read())
+            if stats is not None:
+                stats.count('bytes', os.fstat(fdesc.fileno()).st_size)
+            return cls.from_md_stream(fdesc,
+                                      lazy=lazy,
+                                      stats=stats,
+                                      attributes_only=attributes_only)
+
+    @classmethod
+    def afrom_md_path(cls, path, executor=None, cache=None):
+        """Return a coroutine loading the markdown file at path without
+        blocking the event loop, see ``anchor_txt.aio.load_md_path``.
+
+        Requires python 3.5+.
+        """
+        from . import aio
+        return aio.load_md_path(path, cls=cls, executor=executor, cache=cache)
+
+    @classmethod
+    def from_md_paths(cls,
+                      paths,
+                      workers=None,
+                      cache=None,
+                      stats=None,
+                      attributes_only=False):
+        """Convert many markdown files to Sections using a pool of processes.
+
+        ``paths`` can contain both files and directories, directories are
+        searched recursively for ``*.md`` files.
+
+        ``workers`` is the number of processes to use, defaulting to the number
+        of cpus. With ``workers=1`` everything is parsed in this process.
+
+        ``cache``, ``stats`` and ``attributes_only`` are passed to
+        ``from_md_path``, the stats of all workers are combined.
+
+        Returns a list of ``(path, Section)`` in a stable order.
+        """
+        return list(
+            cls.iter_md_paths(paths,
+                              workers=workers,
+                              cache=cache,
+                              stats=stats,
+                              attributes_only=attributes_only))
+
+    @classmethod
+    def iter_md_paths(cls,
+                      paths,
+                      workers=None,
+                      ordered=True,
+                      cache=None,
+                      stats=None,
+                      attributes_only=False):
+        """Like ``from_md_paths`` but yield ``(path, Section)`` as they are parsed.
+
+        If ``ordered`` is False then results are yielded as soon as they
+        complete instead of in a stable order.
+        """
+        import multiprocessing
+        paths = utils.find_md_paths(paths)
+        if workers is None:
+            workers = multiprocessing.cpu_count()
+        workers = min(workers, len(paths))
+
+        jobs = [(cls, path, cache, stats is not None, attributes_only)
+                for path in paths]
+        if workers <= 1:
+            for job in jobs:
+                path, section, job_stats = _load_md_path(job)
+                if stats is not None:
+                    stats.merge(job_stats)
+                yield path, section
+            return
+
+        pool = multiprocessing.Pool(workers)
+        try:
+            chunksize = max(1, len(jobs) // (workers * 4))
+            imap = pool.imap if ordered else pool.imap_unordered
+            for path, section, job_stats in imap(_load_md_path, jobs,
+                                                 chunksize):
+                if stats is not None:
+                    stats.merge(job_stats)
+                yield path, section
+            pool.close()
+        finally:
+            pool.terminate()
+            pool.join()
 
     def to_dict(self):
         """serialize."""
-        return {
-            "type": self.TYPE,
-            "header": self.header.to_dict() if self.header else None,
-            "attributes": self.attributes,
-            "sections": [s.to_dict() for s in self.sections],
-            "contents": [c.to_dict() for c in self.contents],
-        }
+        # sections are serialized in document order, without recursion
+        dicts = []
+        stack = [(self, dicts)]
+        while stack:
+            section, siblings = stack.pop()
+            sections = []
+            siblings.append({
+                "type": section.TYPE,
+                "header": section.header.to_dict() if section.header else None,
+                "attributes": section.attributes,
+                "sections": sections,
+                "contents": [c.to_dict() for c in section.contents],
+            })
+            if section.sections:
+                stack.extend((s, sections) for s in reversed(section.sections))
+        return dicts[0]
 
     @classmethod
     def from_dict(cls, dct):
         """deserialize"""
-        assert dct['type'] == cls.TYPE
-        section = cls(parent=None,
-                      header=dct['header'],
-                      attributes=dct['attributes'],
-                      sections=[Section.from_dict(s) for s in dct['sections']],
-                      contents=[mdsplit.from_dict(o) for o in dct['contents']])
-
-        for child in section.sections:
-            child.parent = section
+        root = None
+        stack = [(dct, None)]
+        while stack:
+            dct, parent = stack.pop()
+            assert dct['type'] == cls.TYPE
+            header = dct['header']
+            section = cls(
+                parent=parent,
+                header=mdsplit.from_dict(header) if header else None,
+                attributes=dct['attributes'],
+                sections=[],
+                contents=[mdsplit.from_dict(o) for o in dct['contents']])
+            if parent is None:
+                root = section
+            else:
+                parent.sections.append(section)
+            stack.extend((s, section) for s in reversed(dct['sections']))
 
-        return section
+        return root
 
     def to_lines(self):
-        """Serialize the section (and sub-sections) as text lines.
+        """Serialize the section (and sub-sections) as text lines."""
+        lines = []
+        for raw in _iter_raw(self):
+            lines.extend(raw)
+        return lines
 
-        keep_attributes: if True, then keep the attribute code blocks. Otherwise,
-          discard them.
-        """
-        lines = self.header.to_lines() if self.header else []
+    def iter_lines(self):
+        """Yield the text lines of the section (and sub-sections) in order.
 
-        for content in self.contents:
-            lines.extend(content.to_lines())
+        The lines are yielded straight from the components without copying,
+        and lazy sections are not parsed.
+        """
+        for raw in _iter_raw(self):
+            for line in raw:
+                yield line
 
-        for section in self.sections:
-            lines.extend(section.to_lines())
+    def write_to(self, fileobj):
+        """Write the section (and sub-sections) as markdown to an open file.
 
-        return lines
+        The text written is ``'\\n'.join(self.to_lines())``, in batches of
+        lines so that the whole document is never held in memory.
+        """
+        separator = ''
+        batch = []
+        for raw in _iter_raw(self):
+            batch.extend(raw)
+            if len(batch) >= WRITE_BATCH:
+                fileobj.write(separator + '\n'.join(batch))
+                separator = '\n'
+                batch = []
+        if batch:
+            fileobj.write(separator + '\n'.join(batch))
+
+    def spans(self):
+        """Return ``(section, start, end)`` for this section and all sub-sections.
+
+        ``start`` and ``end`` are the line numbers of the section (including its
+        sub-sections) in ``self.to_lines()``, with ``end`` being exclusive.
+        """
+        sections = []
+        starts = []
+        ends = []
+        line = 0
+        # Sections still to be visited, each followed by the index of its
+        # span, which is closed once all of its sub-sections are visited.
+        stack = [self]
+        while stack:
+            section = stack.pop()
+            if isinstance(section, int):
+                ends[section] = line
+                continue
+            stack.append(len(sections))
+            sections.append(section)
+            starts.append(line)
+            ends.append(None)
+            line += _own_line_count(section)
+            stack.extend(reversed(section.sections))
+        return list(zip(sections, starts, ends))
+
+    def walk(self, postorder=False):
+        """Yield ``(section, depth)`` for this section and all sub-sections.
+
+        ``depth`` is 0 for this section. Sections are yielded in document order
+        (before their sub-sections), or after their sub-sections if
+        ``postorder`` is True.
+        """
+        # (section, depth, whether its sub-sections are already on the stack)
+        stack = [(self, 0, False)]
+        while stack:
+            section, depth, expanded = stack.pop()
+            if expanded or not postorder:
+                yield section, depth
+                if expanded:
+                    continue
+            if postorder:
+                stack.append((section, depth, True))
+            stack.extend(
+                (s, depth + 1, False) for s in reversed(section.sections))
+
+    def apply_edit(self, start, end, new_lines):
+        """Replace the lines ``[start, end)`` of ``self.to_lines()`` with new_lines.
+
+        Only the smallest section enclosing the edit is re-parsed and spliced
+        into the tree. If the edit changes the structure around that section
+        (i.e. it removes the header or opens a code fence) then the enclosing
+        sections are tried, falling back to re-parsing the whole document.
+
+        Must be called on the root section. Returns the re-parsed Section.
+        """
+        if not self.is_root():
+            raise ValueError("apply_edit must be called on the root section")
+
+        candidates = [
+            span for span in self.spans()
+            if span[1] <= start and end <= span[2] and not span[0].is_root()
+        ]
+        # sub-sections come after their parents, so this is deepest first.
+        for section, sec_start, _ in reversed(candidates):
+            lines = section.to_lines()
+            lines[start - sec_start:end - sec_start] = new_lines
+            new_section = _reparse_section(section, lines)
+            if new_section is None:
+                continue
+
+            siblings = section.parent.sections
+            for i, sibling in enumerate(siblings):
+                if sibling is section:
+                    siblings[i] = new_section
+                    break
+            new_section.parent = section.parent
+            new_section.invalidate_effective_attributes()
+            new_section.invalidate_fingerprint()
+            return new_section
+
+        lines = self.to_lines()
+        lines[start:end] = new_lines
+        new_root = self.__class__.from_md('\n'.join(lines))
+        self.attributes = new_root.attributes
+        self.sections = new_root.sections
+        self.contents = new_root.contents
+        for child in self.sections:
+            child.parent = self
+        self.invalidate_fingerprint()
+        return self
 
     #pylint: disable=protected-access
     def __eq__(self, other):
-        return isinstance(other,
-                          self.__class__) and other._tuple() == self._tuple()
+        pairs = [(self, other)]
+        while pairs:
+            section, other = pairs.pop()
+            if not (isinstance(other, self.__class__)
+                    and section._tuple() == other._tuple()):
+                return False
+            pairs.extend(zip(section.sections, other.sections))
+        return True
 
     def __repr__(self):
         return "Section(header={}, sections={})".format(
             self.header, self.sections)
 
     def _tuple(self):
-        return (self.header, self.attributes, self.sections, self.contents)
+        """Everything compared by ``__eq__``, except the sub-sections."""
+        return (self.header, self.attributes, len(self.sections),
+                self.contents)
+
+
+class EffectiveAttributes(Mapping):
+    """A read only view of a section's attributes chained to its parent's.
+
+    See ``Section.effective_attributes``.
+    """
+    __slots__ = ('_own', '_parent')
+
+    def __init__(self, own, parent):
+        self._own = own
+        # the EffectiveAttributes of the parent section, or None
+        self._parent = parent
+
+    def __getitem__(self, key):
+        view = self
+        while view is not None:
+            if key in view._own:
+                return view._own[key]
+            view = view._parent
+        raise KeyError(key)
+
+    def __contains__(self, key):
+        view = self
+        while view is not None:
+            if key in view._own:
+                return True
+            view = view._parent
+        return False
+
+    def get(self, key, default=None):
+        view = self
+        while view is not None:
+            if key in view._own:
+                return view._own[key]
+            view = view._parent
+        return default
+
+    def __iter__(self):
+        seen = set()
+        view = self
+        while view is not None:
+            for key in view._own:
+                if key not in seen:
+                    seen.add(key)
+                    yield key
+            view = view._parent
+
+    def __len__(self):
+        return sum(1 for _ in self)
+
+    def to_dict(self):
+        """Return the merged attributes as a new dict."""
+        return {key: self[key] for key in self}
+
+    def __repr__(self):
+        return "EffectiveAttributes({})".format(self.to_dict())
+
+
+#pylint: disable=protected-access
+def _create_effective(section):
+    """Create the EffectiveAttributes of section and any parents without."""
+    pending = []
+    while section is not None and section._effective is None:
+        pending.append(section)
+        section = section.parent
+    parent = None if section is None else section._effective
+    for section in reversed(pending):
+        section._effective = EffectiveAttributes(section.attributes, parent)
+        parent = section._effective
+
+
+#pylint: disable=protected-access
+def _create_fingerprint(root):
+    """Memoize the fingerprints of the tree, skipping memoized sub-trees."""
+    import hashlib
+    stack = [(root, False)]
+    while stack:
+        section, children_done = stack.pop()
+        if not children_done:
+            if section._fingerprint is None:
+                stack.append((section, True))
+                stack.extend((s, False) for s in section.sections)
+            continue
+        # lines never contain '\n' and the repr of the attributes is escaped,
+        # the counts make the text unambiguous.
+        parts = [repr(section.attributes)]
+        if section.header is not None:
+            parts.append(str(len(section.header.raw)))
+            parts.extend(section.header.raw)
+        for content in section.contents:
+            parts.append(content.TYPE)
+            parts.append(str(len(content.raw)))
+            parts.extend(content.raw)
+        own = hashlib.sha1('\n'.join(parts).encode(
+            'utf-8', 'surrogatepass')).hexdigest()
+        tree = hashlib.sha1(own.encode('ascii'))
+        for sub in section.sections:
+            tree.update(sub._fingerprint[1].encode('ascii'))
+        section._fingerprint = (own, tree.hexdigest())
+
+
+def _parse(cls, lines, lazy, stats, attributes_only=False):
+    """Parse markdown lines to a Section."""
+    if attributes_only:
+        if lazy:
+            raise ValueError("attributes_only can't be combined with lazy")
+        return _parse_attributes(cls, mdsplit.split_attributes(lines), stats)
+    if stats is None:
+        if lazy:
+            return cls.from_headers(mdsplit.split_headers(lines))
+        return cls.from_components(mdsplit.split_iter(lines))
+
+    stats.count('files')
+    with stats.timed('build'):
+        if lazy:
+            return cls.from_headers(
+                stats.timed_iter('split', mdsplit.split_headers(lines)))
+        components = stats.timed_iter('split', mdsplit.split_iter(lines),
+                                      'components')
+        return cls.from_components(components, stats=stats)
+
+
+def _parse_attributes(cls, items, stats):
+    """Build a Section from the output of ``mdsplit.split_attributes``."""
+    root = _create_new_section(cls, None, None)
+    if stats is None:
+        _build_attributes(root, items)
+        return root
+    stats.count('files')
+    with stats.timed('build'):
+        _build_attributes(root, stats.timed_iter('split', items), stats)
+    return root
+
+
+def _build_attributes(section, items, stats=None):
+    """Like ``_build`` for the output of ``mdsplit.split_attributes``."""
+    current_section = section
+    snippets = []
+    for line_num, cmt in items:
+        if isinstance(cmt, mdsplit.Header):
+            new_section = _create_new_section(current_section.__class__,
+                                              parent=None,
+                                              header=cmt)
+            _append_section(current_section, new_section)
+            current_section = new_section
+        elif isinstance(cmt, mdsplit.Code):
+            snippets.append((current_section, cmt.attribute_format,
+                             '\n'.join(cmt.text), line_num))
+        else:
+            for match in ATTR_INLINE_RE.finditer(cmt.raw[0]):
+                snippets.append(
+                    (current_section, None, match.group(1), line_num))
+
+    if stats is None:
+        _update_all_attributes(snippets)
+    else:
+        stats.count('attributes', len(snippets))
+        with stats.timed('decode'):
+            _update_all_attributes(snippets)
+
+
+def _build(section, components, line_num, stats=None):
+    """Add the components to the section, creating sub-sections for headers.
+
+    line_num is the line of the first component.
+    """
+    current_section = section
+
+    # (section, attribute_format, text, line) of every attribute. They are
+    # decoded together once the whole document has been split.
+    snippets = []
+
+    # Loop through the components, adding them to the correct section
+    # and collecting attributes.
+    for cmt in components:
+        if isinstance(cmt, mdsplit.Header):
+            # the parent is set by _append_section
+            new_section = _create_new_section(current_section.__class__,
+                                              parent=None,
+                                              header=cmt)
+            _append_section(current_section, new_section)
+            current_section = new_section
+        elif isinstance(cmt, mdsplit.ReferenceLink):
+            current_section._contents.append(cmt)
+        elif isinstance(cmt, mdsplit.Code):
+            if cmt.attribute_format:
+                snippets.append((current_section, cmt.attribute_format,
+                                 '\n'.join(cmt.text), line_num))
+            current_section._contents.append(cmt)
+        else:
+            assert isinstance(cmt, mdsplit.Text)
+            for i, line in enumerate(cmt.raw):
+                if ATTR_INLINE_MARKER not in line:
+                    continue
+                for match in ATTR_INLINE_RE.finditer(line):
+                    snippets.append((current_section, None, match.group(1),
+                                     line_num + i))
+
+            current_section._contents.append(cmt)
+        line_num += len(cmt.raw)
+
+    if stats is None:
+        _update_all_attributes(snippets)
+    else:
+        stats.count('attributes', len(snippets))
+        with stats.timed('decode'):
+            _update_all_attributes(snippets)
+
+
+#pylint: disable=protected-access
+def _own_line_count(section):
+    """The number of lines in the header and contents of the section."""
+    count = len(section.header.raw) if section.header else 0
+    if section._source is not None:
+        # don't parse a lazy section just to count its lines
+        return count + len(section._source[0])
+    for content in section.contents:
+        count += len(content.raw)
+    return count
+
+
+def _iter_raw(root):
+    """Yield the lists of raw lines of the tree, in order."""
+    stack = [root]
+    while stack:
+        section = stack.pop()
+        if section.header is not None:
+            yield section.header.raw
+        if section._source is not None:
+            yield section._source[0]
+        else:
+            for content in section.contents:
+                yield content.raw
+        stack.extend(reversed(section.sections))
+
+
+def _reparse_section(section, lines):
+    """Parse the lines of an edited section.
+
+    Returns None if the result does not fit in the place of the original
+    section, which is the case if:
+    - it fails to parse on its own.
+    - it is no longer a single section at the same header level.
+    - it ends in a header (which could merge with the next header) or an
+      unterminated code fence (which would swallow the following lines).
+    """
+    try:
+        root = section.__class__.from_md('\n'.join(lines))
+    except ValueError:
+        # i.e. a code fence which is closed later in the document
+        return None
+    if root.contents or len(root.sections) != 1:
+        return None
+    new_section = root.sections[0]
+    if new_section.header.level != section.header.level:
+        return None
+
+    last = new_section
+    while last.sections:
+        last = last.sections[-1]
+    if not last.contents:
+        return None
+    last_cmt = last.contents[-1]
+    if isinstance(last_cmt, mdsplit.Code) and mdsplit.is_open_fence(last_cmt):
+        return None
+
+    return new_section
+
+
+def _chunk_text(md_text, num_chunks):
+    """Split markdown at headers into about num_chunks ``(text, line_num)``.
+
+    Code fences are tracked as in ``mdsplit.split_headers``. Adjacent header
+    lines are never split, as they can merge into one header.
+    """
+    # the offsets of the lines which open or close a code fence
+    fences = [mat.start() + 1 for mat in FENCE_LINE_RE.finditer(md_text)]
+    if mdsplit.FENCE_RE.match(md_text.split('\n', 1)[0]):
+        fences.insert(0, 0)
+
+    size = max(1, len(md_text) // num_chunks)
+    starts = [0]
+    pos = size
+    while pos < len(md_text):
+        mat = HEADER_LINE_RE.search(md_text, pos)
+        if mat is None:
+            break
+        start = mat.start() + 1
+        fence = bisect.bisect_left(fences, start)
+        if fence % 2:
+            # in a code fence, continue after it is closed
+            if fence == len(fences):
+                break
+            pos = fences[fence]
+            continue
+        if md_text[md_text.rfind('\n', 0, mat.start()) + 1] == '#':
+            pos = start
+            continue
+        starts.append(start)
+        pos = start + size
+
+    chunks = []
+    line_num = 1
+    for start, end in zip(starts, starts[1:]):
+        chunks.append((md_text[start:end - 1], line_num))
+        line_num += md_text.count('\n', start, end)
+    chunks.append((md_text[starts[-1]:], line_num))
+    return chunks
+
+
+def _parse_chunk(job):
+    """Worker for ``Section.from_md_parallel``."""
+    cls, md_text, line_num = job
+    # the worker only creates objects, don't garbage collect them
+    gc.disable()
+    root = _create_new_section(cls, None, None)
+    _build(root, mdsplit.split_iter(md_text.split('\n')), line_num)
+    # The sections are returned flat, in document order, which is much
+    # faster to pickle than the tree. Their levels give the tree back.
+    return [(section.header, section._attributes, section._contents)
+            for section, _ in root.walk()]
+
+
+def _load_md_path(job):
+    """Worker for ``Section.iter_md_paths``."""
+    cls, path, cache, with_stats, attributes_only = job
+    stats = Stats() if with_stats else None
+    section = cls.from_md_path(path,
+                               cache=cache,
+                               stats=stats,
+                               attributes_only=attributes_only)
+    return path, section, stats
 
 
 def _create_new_section(cls, parent, header):
@@ -166,9 +959,24 @@ def _create_new_section(cls, parent, header):
                contents=[])
 
 
+def _update_all_attributes(snippets):
+    """Decode all attribute snippets, updating the attributes of their sections
+    in order.
+    """
+    values = attrs.load_all([snippet[1:] for snippet in snippets])
+    for snippet, value in zip(snippets, values):
+        _update_attributes(snippet[0], value)
+
+
 def _update_attributes(section, attributes):
     """Update the attributes on a section."""
-    utils.update_dict(section.attributes, attributes)
+    if attributes is None:
+        # an empty attribute block
+        return
+    if not isinstance(attributes, dict):
+        raise ValueError(
+            "attributes must be a mapping, got: {}".format(repr(attributes)))
+    utils.update_dict(section._attributes, attributes)
 
 
 def _append_section(last_section, section):
@@ -178,8 +986,8 @@ def _append_section(last_section, section):
     """
 
     assert section.header.level > 0
-    if last_section.is_root(
-    ) or section.header.level > last_section.header.level:
-        last_section.sections.append(section)
-    else:
-        _append_section(last_section.parent, section)
+    parent = last_section
+    while not (parent.is_root() or section.header.level > parent.header.level):
+        parent = parent.parent
+    parent.sections.append(section)
+    section.parent = parent
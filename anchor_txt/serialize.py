@@ -0,0 +1,158 @@
+# anchor_txt: attributes in markdown
+#
+# Copyright (C) 2019 Rett Berg <github.com/vitiral>
+#
+# The source code is Licensed under either of
+#
+# * Apache License, Version 2.0, ([LICENSE-APACHE](LICENSE-APACHE) or
+#   http://www.apache.org/licenses/LICENSE-2.0)
+# * MIT license ([LICENSE-MIT](LICENSE-MIT) or
+#   http://opensource.org/licenses/MIT)
+#
+# at your option.
+#
+# Unless you explicitly state otherwise, any contribution intentionally submitted
+# for inclusion in the work by you, as defined in the Apache-2.0 license, shall
+# be dual licensed as above, without any additional terms or conditions.
+"""Serialize Sections without building the whole output in memory.
+
+``iter_json`` yields the text of ``json.dumps(section.to_dict(), indent=4)``
+in chunks, encoding one component at a time. ``iter_records`` yields one flat
+record per section, which are written one per line as JSON Lines by
+``dump_jsonl``.
+"""
+from __future__ import unicode_literals
+
+import json
+
+INDENT = 4
+
+
+def iter_json(section, level=0):
+    """Yield the chunks of ``json.dumps(section.to_dict(), indent=4)``.
+
+    level: the indentation level the section is nested at.
+    """
+    encode = _Encoder()
+    # chunks of text, or (section, level) still to be encoded
+    stack = [(section, level)]
+    while stack:
+        item = stack.pop()
+        if not isinstance(item, tuple):
+            yield item
+            continue
+
+        section, level = item
+        pad = ' ' * (INDENT * (level + 1))
+        field = encode.item_separator + '\n' + pad
+        header = section.header.to_dict() if section.header else None
+        yield '{\n' + pad + '"type"' + encode.key_separator
+        yield encode(section.TYPE, level + 1)
+        yield field + '"header"' + encode.key_separator
+        yield encode(header, level + 1)
+        yield field + '"attributes"' + encode.key_separator
+        yield encode(section.attributes, level + 1)
+        yield field + '"sections"' + encode.key_separator
+
+        parts = []
+        if section.sections:
+            child_pad = ' ' * (INDENT * (level + 2))
+            opening = '[\n'
+            for child in section.sections:
+                parts.append(opening + child_pad)
+                parts.append((child, level + 2))
+                opening = encode.item_separator + '\n'
+            parts.append('\n' + pad + ']')
+        else:
+            parts.append('[]')
+        contents = _iter_list(
+            section.contents, level + 1,
+            lambda component, lvl: [encode(component.to_dict(), lvl)])
+        parts.append(field + '"contents"' + encode.key_separator +
+                     ''.join(contents))
+        parts.append('\n' + ' ' * (INDENT * level) + '}')
+        stack.extend(reversed(parts))
+
+
+def iter_json_mapping(items):
+    """Yield the chunks of ``json.dumps({path: section.to_dict()}, indent=4)``.
+
+    items: an iterable of ``(path, Section)``, i.e. ``Section.iter_md_paths``.
+    Each section is encoded as soon as it is produced.
+    """
+    encode = _Encoder()
+    pad = ' ' * INDENT
+    first = True
+    for path, section in items:
+        yield ('{\n' if first else encode.item_separator + '\n') + pad
+        yield encode(path, 1) + encode.key_separator
+        for chunk in iter_json(section, 1):
+            yield chunk
+        first = False
+    yield '{}' if first else '\n}'
+
+
+def iter_records(root, path=None, contents=True):
+    """Yield a flat dict for every section of the tree, in document order.
+
+    Each record has:
+    - ``path``: the given path of the file.
+    - ``index``: the position of the section in the file (the root is 0).
+    - ``parent``: the index of the parent section, None for the root.
+    - ``line``: the (1 based) line the section starts on.
+    - ``level``: the header level, 0 for the root.
+    - ``anchor``, ``header`` and ``attributes`` of the section.
+    - ``contents``: the section's own components, if ``contents`` is True.
+    """
+    indexes = {}
+    for index, (section, start, _) in enumerate(root.spans()):
+        indexes[id(section)] = index
+        header = section.header
+        record = {
+            "path": path,
+            "index": index,
+            "parent": None if section.parent is None else indexes.get(
+                id(section.parent)),
+            "line": start + 1,
+            "level": header.level if header else 0,
+            "anchor": header.anchor if header else None,
+            "header": header.to_dict() if header else None,
+            "attributes": section.attributes,
+        }
+        if contents:
+            record["contents"] = [c.to_dict() for c in section.contents]
+        yield record
+
+
+def dump_jsonl(records, fileobj):
+    """Write each record as a line of json to an open file."""
+    for record in records:
+        fileobj.write(json.dumps(record) + '\n')
+
+
+class _Encoder(json.JSONEncoder):
+    """Encode values nested at an indentation level."""
+    def __init__(self):
+        json.JSONEncoder.__init__(self, indent=INDENT)
+
+    def __call__(self, value, level):
+        text = self.encode(value)
+        if level:
+            text = text.replace('\n', '\n' + ' ' * (INDENT * level))
+        return text
+
+
+def _iter_list(items, level, iter_item):
+    """Yield the chunks of a json list, encoding items with iter_item."""
+    if not items:
+        yield '[]'
+        return
+    pad = ' ' * (INDENT * (level + 1))
+    separator = _Encoder().item_separator + '\n' + pad
+    yield '[\n' + pad
+    for i, item in enumerate(items):
+        if i:
+            yield separator
+        for chunk in iter_item(item, level + 1):
+            yield chunk
+    yield '\n' + ' ' * (INDENT * level) + ']'
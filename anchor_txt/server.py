@@ -0,0 +1,300 @@
+# anchor_txt: attributes in markdown
+#
+# Copyright (C) 2019 Rett Berg <github.com/vitiral>
+#
+# The source code is Licensed under either of
+#
+# * Apache License, Version 2.0, ([LICENSE-APACHE](LICENSE-APACHE) or
+#   http://www.apache.org/licenses/LICENSE-2.0)
+# * MIT license ([LICENSE-MIT](LICENSE-MIT) or
+#   http://opensource.org/licenses/MIT)
+#
+# at your option.
+#
+# Unless you explicitly state otherwise, any contribution intentionally submitted
+# for inclusion in the work by you, as defined in the Apache-2.0 license, shall
+# be dual licensed as above, without any additional terms or conditions.
+"""A long running server answering queries about a loaded corpus.
+
+Requests are JSON-RPC 2.0, one json object per line, over a unix socket or
+stdin/stdout. Requires python 3.5+.
+
+Methods:
+- ``get_section(anchor)``: the section (``Section.to_dict()``) with the
+  anchor, with its ``path`` and ``line``.
+- ``get_attributes(anchor=None, path=None)``: the attributes of the section
+  with the anchor, or of the root section of the file at path.
+- ``list_headers(path=None)``: the headers of every file (or one file).
+- ``reparse(path)``: re-parse a file (or parse a new one).
+- ``paths()``: the paths of the loaded files.
+"""
+from __future__ import unicode_literals
+
+import sys
+import json
+import asyncio
+import functools
+
+from .section import Section
+from .index import AnchorIndex
+
+PARSE_ERROR = -32700
+INVALID_REQUEST = -32600
+METHOD_NOT_FOUND = -32601
+INVALID_PARAMS = -32602
+SERVER_ERROR = -32000
+
+
+class RpcError(Exception):
+    """An error returned to the client."""
+    def __init__(self, code, message):
+        Exception.__init__(self, message)
+        self.code = code
+        self.message = message
+
+
+class Corpus(object):
+    """The loaded files and an index of their anchors.
+
+    ``loader`` is called with a path to parse a file and defaults to
+    ``Section.from_md_path``.
+    """
+    METHODS = ('get_section', 'get_attributes', 'list_headers', 'reparse',
+               'paths')
+
+    def __init__(self, sections=(), loader=None):
+        self.loader = loader or Section.from_md_path
+        self.sections = {}
+        self.anchors = AnchorIndex()
+        for path, section in sections:
+            self.set_section(path, section)
+
+    def set_section(self, path, section):
+        """Add or replace the section of a file."""
+        self.sections[path] = section
+        self.anchors.add(path, section)
+
+    def get_section(self, anchor):
+        """Return the section with the anchor."""
+        entry = self._entry(anchor)
+        return {
+            "path": entry.path,
+            "line": entry.line,
+            "section": entry.section.to_dict(),
+        }
+
+    def get_attributes(self, anchor=None, path=None):
+        """Return the attributes of the section with the anchor, or the root
+        section of the file at path."""
+        if anchor is not None:
+            return self._entry(anchor).section.attributes
+        if path is not None:
+            return self._root(path).attributes
+        raise RpcError(INVALID_PARAMS, "anchor or path is required")
+
+    def list_headers(self, path=None):
+        """Return the headers of all files, or of the file at path."""
+        paths = sorted(self.sections) if path is None else [path]
+        headers = []
+        for file_path in paths:
+            for section, start, _ in self._root(file_path).spans():
+                if section.header is None:
+                    continue
+                headers.append({
+                    "path": file_path,
+                    "line": start + 1,
+                    "level": section.header.level,
+                    "text": section.header.text,
+                    "anchor": section.header.anchor,
+                })
+        return headers
+
+    def reparse(self, path):
+        """Re-parse the file at path."""
+        self.set_section(path, self.loader(path))
+        return {"path": path}
+
+    def paths(self):
+        """Return the paths of the loaded files."""
+        return sorted(self.sections)
+
+    def call(self, method, params):
+        """Call a method with JSON-RPC params (a list or dict)."""
+        if method not in self.METHODS:
+            raise RpcError(METHOD_NOT_FOUND,
+                           "Method not found: {}".format(method))
+        func = getattr(self, method)
+        try:
+            if isinstance(params, dict):
+                return func(**params)
+            return func(*params)
+        except TypeError as err:
+            raise RpcError(INVALID_PARAMS, str(err))
+
+    def _entry(self, anchor):
+        entry = self.anchors.get(anchor)
+        if entry is None:
+            raise RpcError(SERVER_ERROR, "Anchor not found: {}".format(anchor))
+        return entry
+
+    def _root(self, path):
+        try:
+            return self.sections[path]
+        except KeyError:
+            raise RpcError(SERVER_ERROR, "File not loaded: {}".format(path))
+
+
+class Server(object):
+    """Serve JSON-RPC requests for a Corpus.
+
+    Requests are handled concurrently. Re-parsing a file happens in an
+    executor so that it does not block other clients.
+    """
+    def __init__(self, corpus, executor=None):
+        self.corpus = corpus
+        self.executor = executor
+
+    async def handle_line(self, line):
+        """Handle a single request line, returning the response line.
+
+        Returns None for notifications (requests without an id).
+        """
+        try:
+            request = json.loads(line)
+        except ValueError as err:
+            return _error_line(None, PARSE_ERROR, str(err))
+        if not isinstance(request, dict) or 'method' not in request:
+            return _error_line(None, INVALID_REQUEST, "Invalid request")
+
+        req_id = request.get('id')
+        try:
+            result = await self._call(request['method'],
+                                      request.get('params', []))
+        except RpcError as err:
+            response = _error_line(req_id, err.code, err.message)
+        #pylint: disable=broad-except
+        except Exception as err:
+            # one bad request must not stop the server
+            response = _error_line(req_id, SERVER_ERROR, str(err))
+        else:
+            try:
+                # i.e. dates in the attributes are sent as strings
+                response = json.dumps(
+                    {
+                        "jsonrpc": "2.0",
+                        "id": req_id,
+                        "result": result
+                    },
+                    default=str)
+            except (TypeError, ValueError) as err:
+                response = _error_line(req_id, SERVER_ERROR, str(err))
+        if 'id' not in request:
+            return None
+        return response
+
+    async def _call(self, method, params):
+        if method != 'reparse':
+            return self.corpus.call(method, params)
+
+        # parse in the executor, but update the corpus in the event loop
+        corpus = self.corpus
+        loop = _running_loop()
+        path = _path_param(params)
+        section = await loop.run_in_executor(
+            self.executor, functools.partial(corpus.loader, path))
+        corpus.set_section(path, section)
+        return {"path": path}
+
+    async def handle_stream(self, reader, writer):
+        """Handle the requests of a client until it disconnects."""
+        async def write(response):
+            writer.write(response.encode('utf-8') + b'\n')
+            await writer.drain()
+
+        await self._serve_lines(reader, write)
+        writer.close()
+        if hasattr(writer, 'wait_closed'):
+            # new in python 3.7
+            await writer.wait_closed()
+
+    async def serve_unix(self, path):
+        """Serve clients on a unix socket forever."""
+        server = await asyncio.start_unix_server(self.handle_stream, path)
+        try:
+            # the server is never closed, wait until cancelled
+            await asyncio.Event().wait()
+        finally:
+            server.close()
+
+    async def serve_stdio(self):
+        """Serve a single client on stdin/stdout until stdin is closed."""
+        loop = _running_loop()
+        reader = asyncio.StreamReader()
+        await loop.connect_read_pipe(
+            lambda: asyncio.StreamReaderProtocol(reader), sys.stdin)
+
+        async def write(response):
+            sys.stdout.write(response + '\n')
+            sys.stdout.flush()
+
+        await self._serve_lines(reader, write)
+
+    async def _serve_lines(self, reader, write):
+        while True:
+            try:
+                line = await reader.readline()
+            except ValueError as err:
+                # the line is longer than the limit of the reader, the rest
+                # of it can not be told apart from the next request.
+                await write(_error_line(None, PARSE_ERROR, str(err)))
+                break
+            if not line:
+                break
+            if not line.strip():
+                continue
+            response = await self.handle_line(line.decode('utf-8'))
+            if response is not None:
+                await write(response)
+
+
+def serve(corpus, address):
+    """Serve the corpus on a unix socket, or stdin/stdout if address is '-'."""
+    server = Server(corpus)
+    if address == '-':
+        main = server.serve_stdio()
+    else:
+        main = server.serve_unix(address)
+    loop = asyncio.new_event_loop()
+    # before python 3.10 the streams look up the loop themselves
+    asyncio.set_event_loop(loop)
+    try:
+        loop.run_until_complete(main)
+    finally:
+        asyncio.set_event_loop(None)
+        loop.close()
+
+
+def _running_loop():
+    # get_running_loop is new in python 3.7
+    get_loop = getattr(asyncio, 'get_running_loop', asyncio.get_event_loop)
+    return get_loop()
+
+
+def _path_param(params):
+    try:
+        if isinstance(params, dict):
+            return params['path']
+        return params[0]
+    except (KeyError, IndexError, TypeError):
+        raise RpcError(INVALID_PARAMS, "path is required")
+
+
+def _error_line(req_id, code, message):
+    return json.dumps({
+        "jsonrpc": "2.0",
+        "id": req_id,
+        "error": {
+            "code": code,
+            "message": message
+        },
+    })
@@ -0,0 +1,130 @@
+# anchor_txt: attributes in markdown
+#
+# Copyright (C) 2019 Rett Berg <github.com/vitiral>
+#
+# The source code is Licensed under either of
+#
+# * Apache License, Version 2.0, ([LICENSE-APACHE](LICENSE-APACHE) or
+#   http://www.apache.org/licenses/LICENSE-2.0)
+# * MIT license ([LICENSE-MIT](LICENSE-MIT) or
+#   http://opensource.org/licenses/MIT)
+#
+# at your option.
+#
+# Unless you explicitly state otherwise, any contribution intentionally submitted
+# for inclusion in the work by you, as defined in the Apache-2.0 license, shall
+# be dual licensed as above, without any additional terms or conditions.
+"""Timers and counters for the phases of parsing.
+
+Pass a ``Stats`` object as ``stats=`` to ``Section.from_md`` and friends to
+collect them. When no Stats are passed nothing is measured.
+"""
+from __future__ import unicode_literals
+
+import timeit
+
+PHASES = ('read', 'split', 'build', 'decode', 'serialize')
+COUNTERS = ('files', 'bytes', 'lines', 'components', 'attributes',
+            'cache_hits', 'cache_misses')
+
+
+class Stats(object):
+    """Time spent in each phase of parsing and counts of what was parsed.
+
+    Phases are exclusive: time spent in a nested phase (i.e. reading the file
+    while splitting it) is only counted in the nested phase.
+    """
+    def __init__(self):
+        self.times = dict.fromkeys(PHASES, 0.0)
+        self.counts = dict.fromkeys(COUNTERS, 0)
+        # [phase, start] of the running phases, the last one is active.
+        self._stack = []
+
+    def start(self, phase):
+        """Start timing a phase, pausing the currently running phase."""
+        now = timeit.default_timer()
+        if self._stack:
+            running = self._stack[-1]
+            self.times[running[0]] += now - running[1]
+        self._stack.append([phase, now])
+
+    def stop(self):
+        """Stop timing the current phase, resuming the previous one."""
+        now = timeit.default_timer()
+        phase, start = self._stack.pop()
+        self.times[phase] += now - start
+        if self._stack:
+            self._stack[-1][1] = now
+
+    def timed(self, phase):
+        """Return a context manager timing the phase."""
+        return _Timed(self, phase)
+
+    def timed_iter(self, phase, iterable, counter=None):
+        """Wrap iterable so that producing each item is timed as the phase.
+
+        If counter is given it is incremented for each item.
+        """
+        iterator = iter(iterable)
+        count = 0
+        try:
+            while True:
+                self.start(phase)
+                try:
+                    item = next(iterator)
+                except StopIteration:
+                    return
+                finally:
+                    self.stop()
+                count += 1
+                yield item
+        finally:
+            if counter is not None:
+                self.counts[counter] += count
+
+    def count(self, counter, num=1):
+        """Increment a counter."""
+        self.counts[counter] += num
+
+    def merge(self, other):
+        """Add the times and counts of other Stats to these."""
+        for phase, seconds in other.times.items():
+            self.times[phase] += seconds
+        for counter, num in other.counts.items():
+            self.counts[counter] += num
+
+    def total(self):
+        """Return the total time of all phases."""
+        return sum(self.times.values())
+
+    def to_dict(self):
+        """serialize."""
+        return {"times": dict(self.times), "counts": dict(self.counts)}
+
+    def report(self):
+        """Return a human readable breakdown of the stats."""
+        total = self.total()
+        lines = []
+        for phase in PHASES:
+            seconds = self.times[phase]
+            percent = 100.0 * seconds / total if total else 0.0
+            lines.append('{:<12} {:>10.4f}s {:>5.1f}%'.format(
+                phase, seconds, percent))
+        lines.append('{:<12} {:>10.4f}s'.format('total', total))
+        for counter in COUNTERS:
+            lines.append('{:<12} {:>10}'.format(counter, self.counts[counter]))
+        return '\n'.join(lines)
+
+
+class _Timed(object):
+    """Context manager for ``Stats.timed``."""
+    def __init__(self, stats, phase):
+        self.stats = stats
+        self.phase = phase
+
+    def __enter__(self):
+        self.stats.start(self.phase)
+        return self.stats
+
+    def __exit__(self, *exc):
+        self.stats.stop()
@@ -16,6 +16,7 @@
 # be dual licensed as above, without any additional terms or conditions.
 """Utility functions."""
 from __future__ import unicode_literals
+import os
 import six
 from six import PY2
 
@@ -25,37 +26,60 @@ def update_dict(first, second):
 
     Throw a ValueError if any of the keys are already in first.
     """
-    second = to_unicode_recurse(second)
-    invalid = []
-    for key, value in six.iteritems(second):
-        if key in first:
-            invalid.append(key)
-        else:
-            first[key] = value
-
+    if PY2:
+        second = to_unicode_recurse(second)
+    invalid = [key for key in second if key in first]
     if invalid:
         raise ValueError("Keys already exist: {}".format(invalid))
+    first.update(second)
+
+
+if PY2:
 
+    def to_unicode_recurse(value):
+        """Ensure that all text values are unicode."""
+        if isinstance(value, list):
+            return [to_unicode_recurse(v) for v in value]
+        if isinstance(value, dict):
+            return {
+                to_unicode(key): to_unicode_recurse(value)
+                for key, value in six.iteritems(value)
+            }
 
-def to_unicode_recurse(value):
-    """Ensure that all text values are unicode."""
-    if not PY2:
+        return to_unicode(value)
+
+    def to_unicode(value):
+        """Ensure that the value, if text, is unicode."""
+        if isinstance(value, str):
+            value = value.decode('utf-8')
         return value
-    if isinstance(value, list):
-        return [to_unicode_recurse(v) for v in value]
-    if isinstance(value, dict):
-        return {
-            to_unicode(key): to_unicode_recurse(value)
-            for key, value in six.iteritems(value)
-        }
 
-    return to_unicode(value)
+else:
+    # All text is already unicode on python 3
 
+    def to_unicode_recurse(value):
+        """Ensure that all text values are unicode."""
+        return value
 
-def to_unicode(value):
-    """Ensure that the value, if text, is unicode."""
-    if not PY2:
+    def to_unicode(value):
+        """Ensure that the value, if text, is unicode."""
         return value
-    if isinstance(value, str):
-        value = value.decode('utf-8')
-    return value
+
+
+def find_md_paths(paths):
+    """Expand a list of files and directories into a list of markdown files.
+
+    Files are kept in the order given. Directories are searched recursively
+    for ``*.md`` files, which are returned in sorted order.
+    """
+    found = []
+    for path in paths:
+        if not os.path.isdir(path):
+            found.append(path)
+            continue
+        for dirpath, dirnames, filenames in os.walk(path):
+            dirnames.sort()
+            for name in sorted(filenames):
+                if name.endswith('.md'):
+                    found.append(os.path.join(dirpath, name))
+    return found
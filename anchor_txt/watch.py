@@ -0,0 +1,252 @@
+# anchor_txt: attributes in markdown
+#
+# Copyright (C) 2019 Rett Berg <github.com/vitiral>
+#
+# The source code is Licensed under either of
+#
+# * Apache License, Version 2.0, ([LICENSE-APACHE](LICENSE-APACHE) or
+#   http://www.apache.org/licenses/LICENSE-2.0)
+# * MIT license ([LICENSE-MIT](LICENSE-MIT) or
+#   http://opensource.org/licenses/MIT)
+#
+# at your option.
+#
+# Unless you explicitly state otherwise, any contribution intentionally submitted
+# for inclusion in the work by you, as defined in the Apache-2.0 license, shall
+# be dual licensed as above, without any additional terms or conditions.
+"""Keep the Sections of markdown files loaded, re-parsing files which change.
+
+On Linux changes are detected with inotify, elsewhere (or if inotify is not
+available) by polling the size and modification time of the files.
+"""
+from __future__ import unicode_literals
+
+import os
+import sys
+import time
+import errno
+import select
+import struct
+import collections
+
+from . import utils
+
+Event = collections.namedtuple('Event', ['kind', 'path', 'section', 'error'])
+Event.__doc__ = """A change to a watched file.
+
+``kind`` is one of:
+- ``changed``: the file was (re)parsed into ``section``.
+- ``removed``: the file no longer exists.
+- ``error``: the file failed to parse, ``error`` is the exception.
+"""
+
+# inotify constants, see ``man inotify``
+IN_CLOSE_WRITE = 0x8
+IN_MOVED_FROM = 0x40
+IN_MOVED_TO = 0x80
+IN_CREATE = 0x100
+IN_DELETE = 0x200
+IN_DELETE_SELF = 0x400
+IN_Q_OVERFLOW = 0x4000
+IN_ISDIR = 0x40000000
+IN_MASK = (IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE
+           | IN_DELETE | IN_DELETE_SELF)
+_EVENT_STRUCT = struct.Struct('iIII')
+
+
+class Watcher(object):
+    """Watch markdown files and directories, keeping their Sections loaded.
+
+    ``paths`` are files or directories, which are searched recursively for
+    ``*.md`` files. ``loader`` is called with a path to parse a file and
+    defaults to ``Section.from_md_path``.
+
+    The loaded Sections are in ``sections``, a dict of path -> Section.
+    """
+    def __init__(self, paths, loader=None, interval=0.5, use_inotify=True):
+        if loader is None:
+            from .section import Section
+            loader = Section.from_md_path
+        self.paths = [os.path.normpath(path) for path in paths]
+        self.loader = loader
+        self.interval = interval
+        self.sections = {}
+        # path -> (size, mtime) when it was last parsed
+        self._stamps = {}
+        self._inotify = None
+        if use_inotify and sys.platform.startswith('linux'):
+            try:
+                self._inotify = _Inotify()
+            except (OSError, AttributeError):
+                self._inotify = None
+
+    def is_polling(self):
+        """Return whether changes are detected by polling."""
+        return self._inotify is None
+
+    def load(self):
+        """Load every file, returning the list of Events."""
+        if self._inotify is not None:
+            for path in self.paths:
+                self._inotify.add_tree(path)
+        return self.poll()
+
+    def watch(self):
+        """Yield Events forever, starting with those of ``load``."""
+        for event in self.load():
+            yield event
+        while True:
+            if self._inotify is None:
+                time.sleep(self.interval)
+                events = self.poll()
+            else:
+                changed = self._inotify.read(timeout=None)
+                if changed is None:
+                    # the kernel's queue overflowed
+                    events = self.poll()
+                else:
+                    events = self.check(changed, force=True)
+            for event in events:
+                yield event
+
+    def relpath(self, path):
+        """Return path relative to the watched directory containing it, or
+        the file name of a watched file."""
+        abs_path = os.path.abspath(path)
+        for root in self.paths:
+            abs_root = os.path.abspath(root)
+            if os.path.isdir(root) and abs_path.startswith(
+                    os.path.join(abs_root, '')):
+                return os.path.relpath(abs_path, abs_root)
+        return os.path.basename(path)
+
+    def poll(self):
+        """Check every file for changes, returning the list of Events."""
+        paths = set(utils.find_md_paths(self.paths))
+        paths.update(self.sections)
+        return self.check(sorted(paths))
+
+    def check(self, paths, force=False):
+        """Check the given paths for changes, returning the list of Events.
+
+        If force is True then existing files are re-parsed even if their size
+        and modification time are unchanged.
+        """
+        events = []
+        for path in paths:
+            path = os.path.normpath(path)
+            if not self._is_watched(path):
+                continue
+            try:
+                stat = os.stat(path)
+            except OSError:
+                if path in self._stamps:
+                    del self._stamps[path]
+                    self.sections.pop(path, None)
+                    events.append(Event('removed', path, None, None))
+                continue
+
+            stamp = (stat.st_size, stat.st_mtime)
+            if not force and self._stamps.get(path) == stamp:
+                continue
+            self._stamps[path] = stamp
+            try:
+                section = self.loader(path)
+            except (ValueError, IOError, OSError) as err:
+                events.append(Event('error', path, None, err))
+                continue
+            self.sections[path] = section
+            events.append(Event('changed', path, section, None))
+        return events
+
+    def _is_watched(self, path):
+        if path in self._stamps:
+            return True
+        # i.e. a root of '.' contains 'a.md'
+        abs_path = os.path.abspath(path)
+        for root in self.paths:
+            abs_root = os.path.abspath(root)
+            if abs_path == abs_root:
+                return True
+            if (path.endswith('.md') and os.path.isdir(root) and
+                    abs_path.startswith(os.path.join(abs_root, ''))):
+                return True
+        return False
+
+
+class _Inotify(object):
+    """Minimal inotify bindings using ctypes."""
+    def __init__(self):
+        import ctypes
+        import ctypes.util
+        self._libc = ctypes.CDLL(ctypes.util.find_library('c'),
+                                 use_errno=True)
+        self.fd = self._libc.inotify_init()
+        if self.fd < 0:
+            err = ctypes.get_errno()
+            raise OSError(err, os.strerror(err))
+        self._get_errno = ctypes.get_errno
+        # watch descriptor -> directory
+        self._dirs = {}
+
+    def add_tree(self, path):
+        """Watch path, or every directory under it. Return the new md files."""
+        if not os.path.isdir(path):
+            self.add_dir(os.path.dirname(path) or '.')
+            return []
+        for dirpath, _, _ in os.walk(path):
+            self.add_dir(dirpath)
+        return utils.find_md_paths([path])
+
+    def add_dir(self, path):
+        """Watch a single directory."""
+        encoded = path.encode(sys.getfilesystemencoding())
+        wdesc = self._libc.inotify_add_watch(self.fd, encoded, IN_MASK)
+        if wdesc < 0:
+            err = self._get_errno()
+            if err in (errno.ENOENT, errno.ENOTDIR):
+                return
+            raise OSError(err, os.strerror(err))
+        self._dirs[wdesc] = path
+
+    def read(self, timeout):
+        """Wait for changes, returning the list of changed paths.
+
+        Returns None if events were lost and everything should be checked.
+        """
+        readable, _, _ = select.select([self.fd], [], [], timeout)
+        if not readable:
+            return []
+        data = os.read(self.fd, 64 * 1024)
+
+        paths = []
+        pos = 0
+        while pos < len(data):
+            wdesc, mask, _, length = _EVENT_STRUCT.unpack_from(data, pos)
+            pos += _EVENT_STRUCT.size
+            name = data[pos:pos + length].rstrip(b'\0')
+            pos += length
+
+            if mask & IN_Q_OVERFLOW:
+                return None
+            directory = self._dirs.get(wdesc)
+            if directory is None:
+                continue
+            if mask & IN_DELETE_SELF:
+                del self._dirs[wdesc]
+                continue
+            path = os.path.join(directory,
+                                name.decode(sys.getfilesystemencoding()))
+            if mask & IN_ISDIR:
+                if mask & (IN_CREATE | IN_MOVED_TO):
+                    # files can be created before the watch is added
+                    paths.extend(self.add_tree(path))
+                    continue
+                # a directory was removed, the files in it are not reported
+                return None
+            if mask & IN_CREATE:
+                # IN_CLOSE_WRITE follows once the file has been written
+                continue
+            paths.append(path)
+        # a file is often written more than once in a batch
+        return list(collections.OrderedDict.fromkeys(paths))
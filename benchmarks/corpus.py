@@ -0,0 +1,104 @@
+# anchor_txt: attributes in markdown
+#
+# Copyright (C) 2019 Rett Berg <github.com/vitiral>
+#
+# The source code is Licensed under either of
+#
+# * Apache License, Version 2.0, ([LICENSE-APACHE](LICENSE-APACHE) or
+#   http://www.apache.org/licenses/LICENSE-2.0)
+# * MIT license ([LICENSE-MIT](LICENSE-MIT) or
+#   http://opensource.org/licenses/MIT)
+#
+# at your option.
+#
+# Unless you explicitly state otherwise, any contribution intentionally submitted
+# for inclusion in the work by you, as defined in the Apache-2.0 license, shall
+# be dual licensed as above, without any additional terms or conditions.
+"""Generate synthetic markdown corpora for benchmarks.
+
+All generation is seeded, so the same arguments always give the same text.
+"""
+from __future__ import print_function
+
+import os
+import random
+
+WORDS = ('lorem ipsum dolor sit amet consectetur adipiscing elit sed do '
+         'eiusmod tempor incididunt ut labore et dolore magna aliqua').split()
+
+
+def generate(num_sections,
+             seed=0,
+             max_level=6,
+             text_lines=4,
+             inline_attributes=1,
+             attribute_blocks=0,
+             fence_lines=0,
+             indented_lines=0,
+             reference_links=0):
+    """Generate a markdown document.
+
+    num_sections: the number of headers.
+    max_level: the deepest header level. Levels move up and down by at most
+      one, so a large max_level gives deeply nested sections.
+    text_lines: lines of text per section.
+    inline_attributes: inline attributes per section.
+    attribute_blocks: yaml attribute code blocks per section.
+    fence_lines: lines in a fenced code block per section (0 for none).
+    indented_lines: lines in an indented code block per section (0 for none).
+    reference_links: reference links per section.
+    """
+    rng = random.Random(seed)
+    lines = ['preamble text', '']
+    level = 1
+    for i in range(num_sections):
+        level = max(1, min(max_level, level + rng.choice((-1, 0, 1, 1))))
+        lines.append('{} {} {} {{#section-{}}}'.format('#' * level,
+                                                       _words(rng, 3), i, i))
+        for j in range(text_lines):
+            lines.append(_words(rng, 10))
+        for j in range(inline_attributes):
+            lines.append('{} `@{{key-{}-{}: {}}}`'.format(
+                _words(rng, 4), i, j, rng.choice(WORDS)))
+        lines.append('')
+        for j in range(attribute_blocks):
+            lines.extend([
+                '```yaml @',
+                'block-{}-{}:'.format(i, j),
+                '  values: [{}, {}]'.format(rng.randint(0, 100), j),
+                '  owner: {}'.format(rng.choice(WORDS)),
+                '```',
+            ])
+        if fence_lines:
+            lines.append('```python')
+            lines.extend('x_{} = {}'.format(j, j) for j in range(fence_lines))
+            lines.append('```')
+        if indented_lines:
+            lines.append('')
+            lines.extend('    code line {}'.format(j)
+                         for j in range(indented_lines))
+            lines.append('')
+        for j in range(reference_links):
+            lines.append('[ref-{}-{}]: http://example.com/{}/{}'.format(
+                i, j, i, j))
+    return '\n'.join(lines) + '\n'
+
+
+def write_corpus(directory, num_files, seed=0, **kwargs):
+    """Write num_files generated documents to directory.
+
+    kwargs are passed to ``generate``. Returns the list of paths written.
+    """
+    if not os.path.isdir(directory):
+        os.makedirs(directory)
+    paths = []
+    for i in range(num_files):
+        path = os.path.join(directory, 'doc-{:05}.md'.format(i))
+        with open(path, 'w') as fdesc:
+            fdesc.write(generate(seed=seed + i, **kwargs))
+        paths.append(path)
+    return paths
+
+
+def _words(rng, num):
+    return ' '.join(rng.choice(WORDS) for _ in range(num))
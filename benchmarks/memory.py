@@ -0,0 +1,80 @@
+# anchor_txt: attributes in markdown
+#
+# Copyright (C) 2019 Rett Berg <github.com/vitiral>
+#
+# The source code is Licensed under either of
+#
+# * Apache License, Version 2.0, ([LICENSE-APACHE](LICENSE-APACHE) or
+#   http://www.apache.org/licenses/LICENSE-2.0)
+# * MIT license ([LICENSE-MIT](LICENSE-MIT) or
+#   http://opensource.org/licenses/MIT)
+#
+# at your option.
+#
+# Unless you explicitly state otherwise, any contribution intentionally submitted
+# for inclusion in the work by you, as defined in the Apache-2.0 license, shall
+# be dual licensed as above, without any additional terms or conditions.
+"""Measure the memory used by a parsed markdown document.
+
+Run from the repository root with python3:
+
+    python3 -m benchmarks.memory [NUM_SECTIONS]
+
+Prints the bytes allocated per component and per section of the parsed tree,
+as measured by tracemalloc.
+"""
+from __future__ import print_function
+
+import sys
+import gc
+import tracemalloc
+
+from anchor_txt import Section
+
+from . import corpus
+
+
+def count(section):
+    """Return the number of (sections, components) in the tree."""
+    sections, components = 1, len(section.contents)
+    if section.header is not None:
+        components += 1
+    for child in section.sections:
+        child_sections, child_components = count(child)
+        sections += child_sections
+        components += child_components
+    return sections, components
+
+
+def measure(md_text):
+    """Return (bytes, sections, components) of the parsed md_text."""
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    root = Section.from_md(md_text)
+    gc.collect()
+    used = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    sections, components = count(root)
+    return used, sections, components
+
+
+def main(argv):
+    """Print the memory used by a generated document."""
+    num_sections = int(argv[0]) if argv else 10000
+    md_text = corpus.generate(num_sections,
+                              max_level=4,
+                              text_lines=2,
+                              fence_lines=1,
+                              reference_links=1)
+    used, sections, components = measure(md_text)
+    print("sections:             {}".format(sections))
+    print("components:           {}".format(components))
+    print("bytes total:          {}".format(used))
+    print("bytes per component:  {:.1f}".format(used / float(components)))
+    print("bytes per section:    {:.1f}".format(used / float(sections)))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,217 @@
+# anchor_txt: attributes in markdown
+#
+# Copyright (C) 2019 Rett Berg <github.com/vitiral>
+#
+# The source code is Licensed under either of
+#
+# * Apache License, Version 2.0, ([LICENSE-APACHE](LICENSE-APACHE) or
+#   http://www.apache.org/licenses/LICENSE-2.0)
+# * MIT license ([LICENSE-MIT](LICENSE-MIT) or
+#   http://opensource.org/licenses/MIT)
+#
+# at your option.
+#
+# Unless you explicitly state otherwise, any contribution intentionally submitted
+# for inclusion in the work by you, as defined in the Apache-2.0 license, shall
+# be dual licensed as above, without any additional terms or conditions.
+"""Time the main operations of anchor_txt on generated corpora.
+
+Run from the repository root with python3:
+
+    python3 -m benchmarks.run [--scale 0.1] [--output results.json]
+        [--compare previous.json]
+
+Every case is timed as the best of ``--repeat`` runs. Results can be saved as
+json and compared with the results of a previous commit.
+"""
+from __future__ import print_function
+
+import io
+import os
+import sys
+import json
+import shutil
+import argparse
+import platform
+import tempfile
+import subprocess
+import timeit
+
+import anchor_txt
+from anchor_txt import mdsplit
+from anchor_txt import diff
+from anchor_txt import Section
+
+from . import corpus
+
+# name -> kwargs of corpus.generate for a single document
+DOCUMENTS = {
+    'text': dict(num_sections=2000, text_lines=20, inline_attributes=0),
+    'attributes': dict(num_sections=2000, inline_attributes=5,
+                       attribute_blocks=1),
+    'code': dict(num_sections=1000, fence_lines=30, indented_lines=10),
+    'reference-links': dict(num_sections=2000, reference_links=5),
+    'deep': dict(num_sections=5000, max_level=200, text_lines=1),
+    'wide': dict(num_sections=5000, max_level=1, text_lines=1),
+    # nested deeper than the default recursion limit
+    'deepest': dict(num_sections=5000, max_level=5000, text_lines=1),
+    'huge': dict(num_sections=20000, inline_attributes=2, fence_lines=5,
+                 indented_lines=2, reference_links=1),
+}
+
+# kwargs of corpus.write_corpus for the many-files cases
+MANY_FILES = dict(num_files=500, num_sections=20, inline_attributes=2)
+
+
+def best_of(func, repeat):
+    """Return the best time of calling func."""
+    return min(timeit.repeat(func, number=1, repeat=repeat))
+
+
+def scaled(kwargs, scale, key):
+    """Scale the kwargs[key] by scale."""
+    kwargs = dict(kwargs)
+    kwargs[key] = max(1, int(kwargs[key] * scale))
+    return kwargs
+
+
+def bench_document(md_text, repeat):
+    """Time the operations on a single document."""
+    root = Section.from_md(md_text)
+    other = Section.from_md(md_text)
+    dct = root.to_dict()
+    # the same document with the last line changed
+    edited = Section.from_md(md_text.rstrip('\n') + ' edited\n')
+    # memoize the fingerprints, so that only diffing is timed
+    for section in (root, edited):
+        fresh_fingerprint(section)
+    return {
+        'mdsplit.split': best_of(lambda: mdsplit.split(md_text), repeat),
+        'Section.from_md': best_of(lambda: Section.from_md(md_text), repeat),
+        'Section.from_md(lazy)': best_of(
+            lambda: Section.from_md(md_text, lazy=True), repeat),
+        'Section.from_md(attributes_only)': best_of(
+            lambda: Section.from_md(md_text, attributes_only=True), repeat),
+        'Section.to_dict': best_of(root.to_dict, repeat),
+        'Section.to_lines': best_of(root.to_lines, repeat),
+        'Section.write_to': best_of(lambda: root.write_to(io.StringIO()),
+                                    repeat),
+        'Section.from_dict': best_of(lambda: Section.from_dict(dct), repeat),
+        'Section.__eq__': best_of(lambda: root == other, repeat),
+        'Section.spans': best_of(root.spans, repeat),
+        'Section.fingerprint': best_of(lambda: fresh_fingerprint(other),
+                                       repeat),
+        'diff.diff(memoized)': best_of(lambda: diff.diff(root, edited),
+                                       repeat),
+    }
+
+
+def fresh_fingerprint(root):
+    """Compute the fingerprint of the tree without the memoized values."""
+    for section, _ in root.walk():
+        section._fingerprint = None  #pylint: disable=protected-access
+    return root.fingerprint
+
+
+def bench_many_files(directory, repeat):
+    """Time loading and the cli on a directory of files."""
+    cli = [sys.executable, '-m', 'anchor_txt', directory, '--format', 'json']
+    with open(os.devnull, 'w') as devnull:
+        return {
+            'Section.from_md_paths(workers=1)': best_of(
+                lambda: Section.from_md_paths([directory], workers=1), repeat),
+            'Section.from_md_paths': best_of(
+                lambda: Section.from_md_paths([directory]), repeat),
+            'cli': best_of(lambda: subprocess.check_call(cli, stdout=devnull),
+                           repeat),
+        }
+
+
+def run(scale, repeat, cases=None):
+    """Run the benchmarks, returning ``{case: {operation: seconds}}``."""
+    results = {}
+    for name in sorted(DOCUMENTS):
+        if cases and name not in cases:
+            continue
+        kwargs = scaled(DOCUMENTS[name], scale, 'num_sections')
+        results[name] = bench_document(corpus.generate(**kwargs), repeat)
+
+    if not cases or 'many-files' in cases:
+        tmp = tempfile.mkdtemp()
+        try:
+            corpus.write_corpus(tmp, **scaled(MANY_FILES, scale, 'num_files'))
+            results['many-files'] = bench_many_files(tmp, repeat)
+        finally:
+            shutil.rmtree(tmp)
+    return results
+
+
+def git_commit():
+    """Return the current git commit, if any."""
+    try:
+        return subprocess.check_output(
+            ['git', 'rev-parse', 'HEAD'],
+            cwd=os.path.dirname(anchor_txt.__file__)).decode().strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def print_results(results, previous=None):
+    """Print the results, compared to previous results if given."""
+    for case in sorted(results):
+        for operation in sorted(results[case]):
+            seconds = results[case][operation]
+            line = '{:<16} {:<36} {:>10.4f}s'.format(case, operation, seconds)
+            try:
+                before = previous[case][operation]
+            except (KeyError, TypeError):
+                pass
+            else:
+                line += ' {:>7.2f}x'.format(before / seconds)
+            print(line)
+
+
+def main(argv):
+    """Main function for cmdline."""
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    parser.add_argument('--scale',
+                        type=float,
+                        default=1.0,
+                        help='multiply the size of every corpus')
+    parser.add_argument('--repeat',
+                        type=int,
+                        default=3,
+                        help='times each operation is run')
+    parser.add_argument('--case',
+                        action='append',
+                        help='only run the given cases: {}'.format(
+                            ', '.join(sorted(DOCUMENTS) + ['many-files'])))
+    parser.add_argument('--output', help='save the results as json')
+    parser.add_argument('--compare',
+                        help='json results to compare against (speedup)')
+    args = parser.parse_args(argv)
+
+    results = run(args.scale, args.repeat, args.case)
+
+    previous = None
+    if args.compare:
+        with open(args.compare) as fdesc:
+            previous = json.load(fdesc)['results']
+    print_results(results, previous)
+
+    if args.output:
+        with open(args.output, 'w') as fdesc:
+            json.dump(
+                {
+                    'commit': git_commit(),
+                    'python': platform.python_version(),
+                    'scale': args.scale,
+                    'results': results,
+                },
+                fdesc,
+                indent=4)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
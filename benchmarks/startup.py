@@ -0,0 +1,103 @@
+# anchor_txt: attributes in markdown
+#
+# Copyright (C) 2019 Rett Berg <github.com/vitiral>
+#
+# The source code is Licensed under either of
+#
+# * Apache License, Version 2.0, ([LICENSE-APACHE](LICENSE-APACHE) or
+#   http://www.apache.org/licenses/LICENSE-2.0)
+# * MIT license ([LICENSE-MIT](LICENSE-MIT) or
+#   http://opensource.org/licenses/MIT)
+#
+# at your option.
+#
+# Unless you explicitly state otherwise, any contribution intentionally submitted
+# for inclusion in the work by you, as defined in the Apache-2.0 license, shall
+# be dual licensed as above, without any additional terms or conditions.
+"""Measure the startup time of ``import anchor_txt`` and the cli.
+
+Run from the repository root with python3:
+
+    python3 -m benchmarks.startup [REPEAT]
+
+Every measurement is a fresh python process and the best of REPEAT runs is
+printed, along with the modules which are imported. ``python -X importtime``
+gives the per-module breakdown.
+"""
+from __future__ import print_function
+
+import os
+import sys
+import shutil
+import tempfile
+import subprocess
+import timeit
+
+CASES = [
+    ('python', 'pass'),
+    ('import', 'import anchor_txt'),
+    ('parse text', 'import anchor_txt; '
+     'anchor_txt.Section.from_md_path({text!r}).to_dict()'),
+    ('parse attributes', 'import anchor_txt; '
+     'anchor_txt.Section.from_md_path({attributes!r}).to_dict()'),
+    ('cli json', 'import anchor_txt; '
+     'anchor_txt.main([{text!r}, "--format", "json"])'),
+    ('cli yaml', 'import anchor_txt; anchor_txt.main([{text!r}])'),
+]
+
+HEAVY_MODULES = ('yaml', 'json', 'multiprocessing', 'tempfile', 'hashlib',
+                 'argparse')
+
+TEXT_MD = '# header\nsome text\n\n## sub header\nmore text\n'
+ATTRIBUTES_MD = '# header\n`@{foo: [1, 2]}`\n\n```yaml @\nbar: 2\n```\n'
+
+
+def run(code, repeat):
+    """Return the best time of running code in a new python process."""
+    env = dict(os.environ)
+    env['PYTHONPATH'] = os.getcwd()
+    with open(os.devnull, 'w') as devnull:
+        return min(
+            timeit.repeat(lambda: subprocess.check_call(
+                [sys.executable, '-c', code], stdout=devnull, env=env),
+                          number=1,
+                          repeat=repeat))
+
+
+def imported(code):
+    """Return the heavy modules which running code imports."""
+    code += '; import sys; print(" ".join(sorted(sys.modules)))'
+    env = dict(os.environ)
+    env['PYTHONPATH'] = os.getcwd()
+    with open(os.devnull, 'w') as devnull:
+        out = subprocess.check_output([sys.executable, '-c', code],
+                                      stderr=devnull,
+                                      env=env)
+    modules = out.decode('utf-8').split('\n')[-2].split()
+    return [m for m in HEAVY_MODULES if m in modules]
+
+
+def main(argv):
+    """Print the startup time of each case."""
+    repeat = int(argv[0]) if argv else 10
+    tmp = tempfile.mkdtemp()
+    try:
+        paths = {}
+        for name, text in (('text', TEXT_MD), ('attributes', ATTRIBUTES_MD)):
+            paths[name] = os.path.join(tmp, name + '.md')
+            with open(paths[name], 'w') as fdesc:
+                fdesc.write(text)
+
+        print("{:<18} {:>9}  {}".format('case', 'ms', 'heavy imports'))
+        for name, code in CASES:
+            code = code.format(**paths)
+            print("{:<18} {:>9.1f}  {}".format(name,
+                                               run(code, repeat) * 1000,
+                                               ' '.join(imported(code))))
+    finally:
+        shutil.rmtree(tmp)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,112 @@
+"""
+Test loading files from asyncio.
+"""
+
+import os
+import shutil
+import tempfile
+import unittest
+from concurrent import futures
+
+import six
+
+from anchor_txt import Section
+from anchor_txt.cache import ParseCache
+
+if six.PY2:
+    aio = None
+else:
+    import asyncio
+    from anchor_txt import aio
+
+MD = '''`@{{file: {}}}`
+# a {{#a}}
+`@{{x: 1}}`
+'''
+
+
+@unittest.skipIf(aio is None, "asyncio requires python 3.5+")
+class TestAio(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.paths = []
+        for i in range(5):
+            path = os.path.join(self.tmp, 'f{}.md'.format(i))
+            with open(path, 'w') as fdesc:
+                fdesc.write(MD.format(i))
+            self.paths.append(path)
+        self.loop = asyncio.new_event_loop()
+
+    def tearDown(self):
+        self.loop.close()
+        shutil.rmtree(self.tmp)
+
+    def run_async(self, coro):
+        return self.loop.run_until_complete(coro)
+
+    def test_load_md_path(self):
+        path = self.paths[0]
+        result = self.run_async(Section.afrom_md_path(path))
+        assert result == Section.from_md_path(path)
+
+        cache = ParseCache(os.path.join(self.tmp, 'cache'))
+        for _ in range(2):
+            result = self.run_async(Section.afrom_md_path(path, cache=cache))
+            assert result == Section.from_md_path(path)
+
+    def test_load_md_paths(self):
+        with futures.ThreadPoolExecutor(2) as executor:
+            result = self.run_async(
+                aio.load_md_paths([self.tmp], executor=executor, limit=2))
+        assert result == Section.from_md_paths([self.tmp], workers=1)
+
+    def test_as_completed(self):
+        async def collect():
+            found = {}
+            for load in aio.as_completed(self.paths, limit=1):
+                path, section = await load
+                found[path] = section
+            return found
+
+        found = self.run_async(collect())
+        assert sorted(found) == self.paths
+        assert found[self.paths[3]].attributes == {'file': 3}
+
+    def test_limit(self):
+        running = []
+        peak = []
+
+        def loader(md_text):
+            running.append(md_text)
+            peak.append(len(running))
+            try:
+                return Section.from_md(md_text)
+            finally:
+                running.pop()
+
+        class Limited(Section):
+            __slots__ = ()
+            from_md = staticmethod(loader)
+
+        with futures.ThreadPoolExecutor(5) as executor:
+            result = self.run_async(
+                aio.load_md_paths(self.paths,
+                                  cls=Limited,
+                                  executor=executor,
+                                  limit=2))
+        assert len(result) == 5
+        assert max(peak) <= 2
+
+    def test_error(self):
+        missing = os.path.join(self.tmp, 'missing.md')
+
+        async def collect():
+            errors = 0
+            for load in aio.as_completed(self.paths + [missing]):
+                try:
+                    await load
+                except IOError:
+                    errors += 1
+            return errors
+
+        assert self.run_async(collect()) == 1
@@ -0,0 +1,101 @@
+"""
+Test decoding of attributes.
+
+The fast paths must give the same result as yaml.
+"""
+
+import json
+import unittest
+import six
+import yaml
+from anchor_txt import attributes
+from anchor_txt import utils
+from anchor_txt.section import Section
+
+INLINE = [
+    'foo',
+    ' foo ',
+    'foo-bar_2',
+    'foo: bar',
+    'foo:  bar',
+    'foo: 42',
+    'foo: -7',
+    'foo: +0',
+    'foo: 007',
+    'foo: 1.5',
+    'foo:bar',
+    'foo: bar baz',
+    'foo: yes',
+    'foo: Off',
+    'foo: NULL',
+    'foo: tRUE',
+    'true',
+    'True: 1',
+    'null',
+    '~',
+    '',
+    '{a: 1, b: [1, 2]}',
+    '2019-01-01',
+    '1',
+]
+
+
+def yaml_inline(text):
+    value = utils.to_unicode(yaml.safe_load(text))
+    if isinstance(value, six.text_type):
+        value = {value: None}
+    return value
+
+
+class TestAttributes(unittest.TestCase):
+    def test_inline(self):
+        for text in INLINE:
+            expected = yaml_inline(text)
+            result = attributes.load_inline(text)
+            assert expected == result, repr(text)
+            if isinstance(expected, dict):
+                assert [type(v) for v in expected.values()] == \
+                    [type(v) for v in result.values()], repr(text)
+
+    def test_json_block(self):
+        text = '{\n  "a": [1, 2.5, "c"],\n  "b": {"true": true, "n": null}\n}'
+        expected = yaml.safe_load(text)
+        assert expected == attributes.load_block('json', text)
+        assert json.loads(text) == attributes.load_block('yaml', text)
+
+    def test_load_all(self):
+        snippets = [(None, text, i) for i, text in enumerate(INLINE)]
+        snippets.append(('yaml', '---\na: 1', 100))
+        snippets.append(('yaml', 'b: [1, 2]', 101))
+        snippets.append(('yaml', 'b: [1, 2]', 102))
+        expected = [yaml_inline(text) for text in INLINE]
+        expected.extend([{'a': 1}, {'b': [1, 2]}, {'b': [1, 2]}])
+        result = attributes.load_all(snippets)
+        assert expected == result
+        # identical snippets must not share values
+        assert result[-1] is not result[-2]
+        assert result[-1]['b'] is not result[-2]['b']
+
+    def test_errors(self):
+        md = '# a\n`@{a: [1]}`\n\n# b\ntext `@{b: [}`\n'
+        try:
+            Section.from_md(md)
+            assert False
+        except attributes.DecodeError as err:
+            assert err.line == 5
+
+        md = '```json @\n{"a": }\n```\n'
+        try:
+            Section.from_md(md)
+            assert False
+        except attributes.DecodeError as err:
+            assert err.line == 1
+
+    def test_duplicate_keys(self):
+        md = '`@{a: [1]}`\n```yaml @\na: [2]\n```\n'
+        self.assertRaises(ValueError, Section.from_md, md)
+        # the same key in different sections is fine
+        md = '# a\n`@{a: [1]}`\n# b\n`@{a: [1]}`'
+        root = Section.from_md(md)
+        assert [{'a': [1]}, {'a': [1]}] == \
+            [s.attributes for s in root.sections]
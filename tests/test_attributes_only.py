@@ -0,0 +1,132 @@
+"""
+Test parsing only the headers and attributes.
+
+The result must have the same headers and attributes as a full parse.
+"""
+
+import io
+import os
+import glob
+import random
+import itertools
+import unittest
+
+from anchor_txt import Section
+from anchor_txt import attributes
+from anchor_txt import utils
+
+TESTS = os.path.dirname(os.path.abspath(__file__))
+
+TRICKY = '''`@{root: 1}`
+# a {#a}
+# merged
+```yaml @
+a: 1
+```
+
+    indented `@{not: attribute}`
+  text `@{b: 2}`
+[ref]: `@{not: attribute}`
+```
+`@{not: attribute}`
+```
+## b `@{not: attribute}`
+```python
+# not a header
+```
+text
+    not indented code `@{c: 3}`
+```json @
+{"d": 4}
+'''
+
+# lines which change the state of the lexer
+PIECES = [
+    '# h', '## h2 {#x}', '# h `@{i: 8}`', '', ' ', '\r', 'text `@{b: 2}`',
+    '    indented `@{a: 1}`', '  `@{h: 7}`', '\t`@{j: 1}`', '```', '``` ',
+    '````', '```yaml @', 'c: 3', 'd: [', '```python', '[ref]: `@{e: 4}`'
+]
+
+
+def shape(root):
+    return [(depth, s.header.raw if s.header else None, s.attributes)
+            for s, depth in root.walk()]
+
+
+class TestAttributesOnly(unittest.TestCase):
+    def check(self, md_text):
+        expected = shape(Section.from_md(md_text))
+        root = Section.from_md(md_text, attributes_only=True)
+        assert shape(root) == expected
+        assert all(not s.contents for s, _ in root.walk())
+        fileobj = io.StringIO(utils.to_unicode(md_text))
+        stream = Section.from_md_stream(fileobj, attributes_only=True)
+        assert shape(stream) == expected
+
+    def test_files(self):
+        paths = glob.glob(os.path.join(TESTS, '*', '*.md'))
+        assert paths
+        for path in paths:
+            with io.open(path, encoding='utf-8') as fdesc:
+                self.check(fdesc.read())
+
+    def test_tricky(self):
+        self.check(TRICKY)
+        self.check(TRICKY.replace('\n', '\r\n'))
+        root = Section.from_md(TRICKY, attributes_only=True)
+        assert root.attributes == {'root': 1}
+        assert root.sections[0].header.text == ['a', 'merged']
+        assert root.sections[0].attributes == {'a': 1, 'b': 2}
+        assert root.sections[0].sections[0].attributes == {'c': 3, 'd': 4}
+
+    def check_lexers(self, md_text):
+        try:
+            Section.from_md(md_text)
+        except ValueError as err:
+            with self.assertRaises(type(err)) as only:
+                Section.from_md(md_text, attributes_only=True)
+            assert str(only.exception) == str(err)
+        else:
+            self.check(md_text)
+
+    def test_sequences(self):
+        # the attributes-only lexer must stay in step with the full one:
+        # every sequence of up to three pieces, then longer random ones
+        for num in range(1, 4):
+            for lines in itertools.product(PIECES, repeat=num):
+                self.check_lexers('\n'.join(lines))
+        rng = random.Random(0)
+        for _ in range(3000):
+            # a few pieces per document, so that they repeat
+            pieces = rng.sample(PIECES, rng.randint(2, 4))
+            self.check_lexers('\n'.join(
+                rng.choice(pieces) for _ in range(rng.randint(4, 16))))
+
+    def test_error_line(self):
+        md_text = '# a\ntext\n\n```yaml @\n- [\n```\n'
+        with self.assertRaises(attributes.DecodeError) as full:
+            Section.from_md(md_text)
+        with self.assertRaises(attributes.DecodeError) as only:
+            Section.from_md(md_text, attributes_only=True)
+        assert only.exception.line == full.exception.line
+
+    def test_invalid(self):
+        with self.assertRaises(ValueError):
+            Section.from_md('# a', lazy=True, attributes_only=True)
+        path = os.path.join(TESTS, 'attributes', 'header.md')
+        with self.assertRaises(ValueError):
+            Section.from_md_path(path, mmap=True, attributes_only=True)
+
+    def test_paths(self):
+        directory = os.path.join(TESTS, 'attributes')
+        full = Section.from_md_paths([directory], workers=1)
+        only = Section.from_md_paths([directory],
+                                     workers=1,
+                                     attributes_only=True)
+        assert [p for p, _ in only] == [p for p, _ in full]
+        for (_, expected), (_, section) in zip(full, only):
+            assert shape(section) == shape(expected)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,83 @@
+"""
+Test the on-disk parse cache.
+"""
+
+import os
+import shutil
+import tempfile
+import unittest
+from anchor_txt import cache
+from anchor_txt.cache import ParseCache
+from anchor_txt.section import Section
+
+SCRIPT_PATH = os.path.realpath(__file__)
+TEST_DIR = os.path.dirname(SCRIPT_PATH)
+ATTRS_DIR = os.path.join(TEST_DIR, "attributes")
+
+
+class TestParseCache(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.cache = ParseCache(os.path.join(self.tmp, 'cache'))
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp)
+
+    def test_round_trip(self):
+        for name in os.listdir(ATTRS_DIR):
+            if not name.endswith('.md'):
+                continue
+            path = os.path.join(ATTRS_DIR, name)
+            expected = Section.from_md_path(path)
+            # first is a miss, second is a hit
+            assert expected == Section.from_md_path(path, cache=self.cache)
+            assert expected == Section.from_md_path(path, cache=self.cache)
+
+    def test_invalidated(self):
+        path = os.path.join(self.tmp, 'doc.md')
+        with open(path, 'w') as fdesc:
+            fdesc.write('# header\n`@{foo}`\n')
+        first = Section.from_md_path(path, cache=self.cache)
+        assert {'foo': None} == first.sections[0].attributes
+
+        with open(path, 'w') as fdesc:
+            fdesc.write('# header\n`@{bar: 2}`\n')
+        os.utime(path, (0, 0))
+        second = Section.from_md_path(path, cache=self.cache)
+        assert {'bar': 2} == second.sections[0].attributes
+
+    def test_hash_contents(self):
+        cache = ParseCache(os.path.join(self.tmp, 'cache'), hash_contents=True)
+        path = os.path.join(self.tmp, 'doc.md')
+        for text in ('`@{foo}`', '`@{bar}`'):
+            with open(path, 'w') as fdesc:
+                fdesc.write(text)
+            os.utime(path, (0, 0))
+            expected = Section.from_md_path(path)
+            assert expected == Section.from_md_path(path, cache=cache)
+
+    def test_not_stored(self):
+        path = os.path.join(self.tmp, 'doc.md')
+        for text in ('`@{1: one}`', '`@{a: [{2: two}]}`', '`@{a: 2020-01-01}`'):
+            with open(path, 'w') as fdesc:
+                fdesc.write(text)
+            os.utime(path, (0, 0))
+            expected = Section.from_md_path(path)
+            assert expected == Section.from_md_path(path, cache=self.cache)
+            assert [] == os.listdir(self.cache.directory)
+
+    def test_write_failure(self):
+        path = os.path.join(ATTRS_DIR, 'word.md')
+
+        def fail(src, dst):
+            raise OSError("failed to replace {}".format(dst))
+
+        replace = cache._replace
+        cache._replace = fail
+        try:
+            with self.assertRaises(OSError):
+                Section.from_md_path(path, cache=self.cache)
+        finally:
+            cache._replace = replace
+        # the temporary file is removed
+        assert [] == os.listdir(self.cache.directory)
@@ -0,0 +1,51 @@
+"""
+Test running the command line.
+"""
+
+import os
+import sys
+import json
+import unittest
+import subprocess
+
+TEST_DIR = os.path.dirname(os.path.abspath(__file__))
+WORD_MD = os.path.join(TEST_DIR, 'attributes', 'word.md')
+
+
+def run(*args, **kwargs):
+    env = dict(os.environ)
+    env['PYTHONPATH'] = os.path.dirname(TEST_DIR)
+    cmd = [sys.executable, '-W', 'error', '-m', 'anchor_txt'] + list(args)
+    proc = subprocess.Popen(cmd,
+                            env=env,
+                            stdin=subprocess.PIPE,
+                            stdout=subprocess.PIPE,
+                            stderr=subprocess.PIPE)
+    out, err = proc.communicate(kwargs.get('stdin', b''))
+    assert proc.returncode == 0, err.decode('utf-8')
+    return out
+
+
+class TestCli(unittest.TestCase):
+    def test_single_json_stats(self):
+        expected = json.loads(run(WORD_MD, '--format', 'json').decode('utf-8'))
+        for extra in ([], ['--attributes-only']):
+            out = run(WORD_MD, '--format', 'json', '--stats', *extra)
+            section = json.loads(out.decode('utf-8'))
+            assert expected['attributes'] == section['attributes']
+            assert len(expected['sections']) == len(section['sections'])
+
+    def test_serve_stdio(self):
+        if sys.version_info < (3, 5):
+            raise unittest.SkipTest("the server requires python 3.5+")
+        request = {"jsonrpc": "2.0", "id": 1, "method": "paths"}
+        out = run(WORD_MD,
+                  '--serve',
+                  '-',
+                  stdin=json.dumps(request).encode('utf-8') + b'\n')
+        response = json.loads(out.decode('utf-8'))
+        assert response == {"jsonrpc": "2.0", "id": 1, "result": [WORD_MD]}
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,36 @@
+"""
+Test loading many files at once.
+"""
+
+import os
+import unittest
+import anchor_txt
+from anchor_txt.section import Section
+
+SCRIPT_PATH = os.path.realpath(__file__)
+TEST_DIR = os.path.dirname(SCRIPT_PATH)
+ATTRS_DIR = os.path.join(TEST_DIR, "attributes")
+
+
+class TestFromMdPaths(unittest.TestCase):
+    def expected(self):
+        names = sorted(n for n in os.listdir(ATTRS_DIR) if n.endswith('.md'))
+        paths = [os.path.join(ATTRS_DIR, n) for n in names]
+        return [(p, Section.from_md_path(p)) for p in paths]
+
+    def test_serial(self):
+        result = Section.from_md_paths([ATTRS_DIR], workers=1)
+        assert self.expected() == result
+
+    def test_parallel(self):
+        result = Section.from_md_paths([ATTRS_DIR], workers=2)
+        assert self.expected() == result
+
+    def test_unordered(self):
+        result = Section.iter_md_paths([ATTRS_DIR], workers=2, ordered=False)
+        assert sorted(self.expected()) == sorted(result)
+
+    def test_files(self):
+        expected = self.expected()[:2]
+        result = Section.from_md_paths([p for p, _ in expected])
+        assert expected == result
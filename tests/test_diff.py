@@ -0,0 +1,98 @@
+"""
+Test section fingerprints and diffing trees.
+"""
+
+import unittest
+
+from anchor_txt import Section
+from anchor_txt import diff
+
+OLD = '''`@{a: 1}`
+# a {#a}
+`@{x: 1}`
+## a.1
+text
+# b
+text b
+# c {#c}
+'''
+
+NEW = '''`@{a: 1}`
+# c {#c}
+more
+
+# a {#a}
+`@{x: 2}` `@{y: 3}`
+## a.1
+text
+# d {#d}
+'''
+
+
+def summary(changes):
+    return [(c.kind, c.old.header.text[0] if c.old else None,
+             c.new.header.text[0] if c.new else None) for c in changes]
+
+
+class TestFingerprint(unittest.TestCase):
+    def test_equal(self):
+        old = Section.from_md(OLD)
+        assert old.fingerprint == Section.from_md(OLD).fingerprint
+        assert old.fingerprint != Section.from_md(NEW).fingerprint
+        assert (old.sections[0].sections[0].fingerprint ==
+                Section.from_md(NEW).sections[1].sections[0].fingerprint)
+
+    def test_invalidate(self):
+        root = Section.from_md(OLD)
+        before = root.fingerprint
+        child = root.sections[0].sections[0]
+        child_before = child.fingerprint
+
+        child.attributes = {'z': 1}
+        assert child.fingerprint != child_before
+        assert root.fingerprint != before
+
+        child.attributes = {}
+        assert root.fingerprint == before
+
+        lines = root.to_lines()
+        root.apply_edit(4, 5, ['changed'])
+        assert root.fingerprint != before
+        root.apply_edit(4, 5, lines[4:5])
+        assert root.fingerprint == before
+
+
+class TestDiff(unittest.TestCase):
+    def test_identical(self):
+        assert diff.diff(Section.from_md(OLD), Section.from_md(OLD)) == []
+
+    def test_diff(self):
+        changes = diff.diff(Section.from_md(OLD), Section.from_md(NEW))
+        assert summary(changes) == [
+            (diff.CHANGED, 'c', 'c'),
+            (diff.CHANGED, 'a', 'a'),
+            (diff.ADDED, None, 'd'),
+            (diff.REMOVED, 'b', None),
+        ]
+        assert changes[0].attributes == {}
+        assert changes[1].attributes == {
+            'x': (1, 2),
+            'y': (diff.MISSING, 3),
+        }
+        assert diff.to_dict(changes[1]) == {
+            "change": "changed",
+            "anchor": "a",
+            "header": ["a"],
+            "attributes": {
+                "x": {"old": 1, "new": 2},
+                "y": {"new": 3},
+            },
+        }
+
+    def test_unanchored(self):
+        old = Section.from_md('# x\none\n# y\ntwo\n# z\nthree\n')
+        new = Section.from_md('# x\none\n# new\n\n# y\ntwo\n# z\nchanged\n')
+        assert summary(diff.diff(old, new)) == [
+            (diff.ADDED, None, 'new'),
+            (diff.CHANGED, 'z', 'z'),
+        ]
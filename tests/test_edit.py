@@ -0,0 +1,103 @@
+"""
+Test incremental re-parsing with Section.apply_edit.
+
+Every edit is checked against parsing the edited document from scratch.
+"""
+
+import random
+import unittest
+from anchor_txt.section import Section
+
+DOC = '''preamble `@{top}`
+
+# one {#one}
+text in one
+
+## one.a
+`@{a: 1}`
+
+    indented code
+    `@{not: attr}`
+
+## one.b
+```yaml @
+b: 2
+```
+
+# two
+[ref]: http://example.com
+```
+# not a header
+```
+'''
+
+SNIPPETS = [
+    [],
+    [''],
+    ['new text `@{new}`'],
+    ['# three'],
+    ['## three.a', 'text'],
+    ['### deeper'],
+    ['```'],
+    ['```', 'code', '```'],
+    ['    indented'],
+    ['#### a', '#### b'],
+]
+
+
+def check_parents(section):
+    for child in section.sections:
+        assert child.parent is section
+        check_parents(child)
+
+
+class TestApplyEdit(unittest.TestCase):
+    def check_edit(self, start, end, new_lines):
+        lines = DOC.split('\n')
+        root = Section.from_md(DOC)
+        lines[start:end] = new_lines
+        try:
+            expected = Section.from_md('\n'.join(lines))
+        except ValueError as err:
+            self.assertRaises(type(err), root.apply_edit, start, end,
+                              new_lines)
+            return
+
+        root.apply_edit(start, end, new_lines)
+        assert expected == root, (start, end, new_lines)
+        assert lines == root.to_lines()
+        check_parents(root)
+
+    def test_spans(self):
+        root = Section.from_md(DOC)
+        lines = root.to_lines()
+        for section, start, end in root.spans():
+            assert section.to_lines() == lines[start:end]
+
+    def test_replace_text(self):
+        self.check_edit(3, 4, ['changed `@{changed}`'])
+
+    def test_reparses_smallest(self):
+        root = Section.from_md(DOC)
+        one = root.sections[0]
+        one_b = one.sections[1]
+        result = root.apply_edit(13, 14, ['b: 3'])
+        assert result.header.text == ['one.b']
+        assert {'b': 3} == result.attributes
+        assert root.sections[0] is one
+        assert one.sections[1] is result
+        assert one.sections[1] is not one_b
+
+    def test_open_fence(self):
+        self.check_edit(7, 7, ['```'])
+
+    def test_remove_header(self):
+        self.check_edit(11, 12, [])
+
+    def test_random(self):
+        rand = random.Random(42)
+        num_lines = len(DOC.split('\n'))
+        for _ in range(500):
+            start = rand.randint(0, num_lines)
+            end = rand.randint(start, min(num_lines, start + 3))
+            self.check_edit(start, end, rand.choice(SNIPPETS))
@@ -0,0 +1,84 @@
+"""
+Test the attributes inherited from parent sections.
+"""
+
+import unittest
+
+from anchor_txt import Section
+
+MD = '''`@{owner: root}`
+# a
+`@{owner: alice}`
+`@{a: 1}`
+## a.1
+`@{x: 1}`
+# b
+`@{b: 2}`
+'''
+
+
+class TestEffective(unittest.TestCase):
+    def setUp(self):
+        self.root = Section.from_md(MD)
+        self.a, self.b = self.root.sections
+        self.a1 = self.a.sections[0]
+
+    def test_inherit(self):
+        assert {'owner': 'root'} == self.root.effective_attributes
+        assert {'owner': 'alice', 'a': 1, 'x': 1} == \
+            self.a1.effective_attributes.to_dict()
+        assert {'owner': 'root', 'b': 2} == dict(self.b.effective_attributes)
+
+        effective = self.a1.effective_attributes
+        assert 'alice' == effective['owner']
+        assert 'a' in effective
+        assert 'b' not in effective
+        assert None is effective.get('b')
+        assert 3 == len(effective)
+        assert ['x', 'owner', 'a'] == list(effective)
+        self.assertRaises(KeyError, lambda: effective['b'])
+
+    def test_memoized(self):
+        effective = self.a1.effective_attributes
+        assert effective is self.a1.effective_attributes
+        assert self.a.effective_attributes is effective._parent
+
+        # changes to the attribute dicts are visible
+        self.root.attributes['team'] = 'core'
+        assert 'core' == effective['team']
+
+    def test_invalidate(self):
+        effective = self.a1.effective_attributes
+        self.a.attributes = {'owner': 'bob'}
+        assert self.a1.effective_attributes is not effective
+        assert {'owner': 'bob', 'x': 1} == self.a1.effective_attributes
+
+        # moving a section by hand
+        self.b.sections.append(self.a1)
+        self.a1.parent = self.b
+        self.a1.invalidate_effective_attributes()
+        assert {'owner': 'root', 'b': 2, 'x': 1} == \
+            self.a1.effective_attributes
+
+    def test_edit(self):
+        assert 'alice' == self.a1.effective_attributes['owner']
+        self.root.apply_edit(2, 3, ['`@{owner: carol}`'])
+        a1 = self.root.sections[0].sections[0]
+        assert 'carol' == a1.effective_attributes['owner']
+
+        # the edit removes the sub header, re-parsing the whole document
+        self.root.apply_edit(0, 1, ['`@{owner: dave}`'])
+        assert 'dave' == self.root.sections[1].effective_attributes['owner']
+
+    def test_deep(self):
+        md = '\n'.join('{} h{}\n`@{{k{}: {}}}`'.format('#' * (i + 1), i, i, i)
+                       for i in range(3000))
+        root = Section.from_md(md)
+        deepest = root.spans()[-1][0]
+        assert 2999 == deepest.effective_attributes['k2999']
+        assert 0 == deepest.effective_attributes['k0']
+        assert 3000 == len(deepest.effective_attributes)
+
+
+if __name__ == '__main__':
+    unittest.main()
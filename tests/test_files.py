@@ -1,3 +1,4 @@
+import io
 import os
 import json
 import unittest
@@ -53,9 +54,12 @@ class TestSplit(unittest.TestCase):
     def test_reference_links(self):
         self.run_test('reference-links')
 
-    def test_reference_links(self):
+    def test_anchor_html(self):
         self.run_test('anchor_html')
 
+    def test_indented(self):
+        self.run_test('indented')
+
 
 class TestAttributes(unittest.TestCase):
     def run_test(self, name):
@@ -69,6 +73,10 @@ class TestAttributes(unittest.TestCase):
         expected = read_lines(md_path)
         assert expected == result, "lines for file " + name
 
+        out = io.StringIO()
+        section.write_to(out)
+        assert '\n'.join(expected) == out.getvalue(), "text for file " + name
+
     def test_word(self):
         self.run_test('word')
 
@@ -92,3 +100,31 @@ class TestAttributes(unittest.TestCase):
 
     def test_reference_links(self):
         self.run_test('reference-links')
+
+
+class TestStream(unittest.TestCase):
+    """Parsing a stream must give the same result as parsing the text."""
+    def run_test(self, path):
+        text = read(path)
+        expected = [c.to_dict() for c in anchor_txt.mdsplit.split(text)]
+        with open(path) as fdesc:
+            result = [
+                c.to_dict() for c in anchor_txt.mdsplit.split_stream(fdesc)
+            ]
+        assert expected == result, "for file " + path
+
+        with open(path) as fdesc:
+            section = anchor_txt.Section.from_md_stream(fdesc)
+        assert anchor_txt.Section.from_md(text) == section
+
+    def test_all(self):
+        for directory in (SPLITS_DIR, ATTRS_DIR):
+            for name in sorted(os.listdir(directory)):
+                if name.endswith('.md'):
+                    self.run_test(os.path.join(directory, name))
+
+    def test_trailing_newline(self):
+        for text in ('', '\n', 'a', 'a\n', 'a\n\n', '# a\nb'):
+            lines = list(anchor_txt.mdsplit.iter_lines(
+                io.StringIO(anchor_txt.utils.to_unicode(text))))
+            assert text.split('\n') == lines, repr(text)
@@ -0,0 +1,132 @@
+"""
+Test the indexes over many sections.
+"""
+
+import io
+import unittest
+from anchor_txt.index import AnchorIndex
+from anchor_txt.index import AttributeIndex
+from anchor_txt.section import Section
+
+DOC_A = '''# one {#one}
+text
+
+## two {#two}
+`@{status: done}`
+'''
+
+DOC_B = '''preamble
+
+# three {#three}
+text
+# four {#two}
+'''
+
+
+class TestAnchorIndex(unittest.TestCase):
+    def setUp(self):
+        self.a = Section.from_md(DOC_A)
+        self.b = Section.from_md(DOC_B)
+        self.index = AnchorIndex.from_sections([('a.md', self.a),
+                                                ('b.md', self.b)])
+
+    def test_get(self):
+        entry = self.index.get('one')
+        assert ('one', 'a.md', 1) == entry[:3]
+        assert self.a.sections[0] is entry.section
+
+        entry = self.index.get('two')
+        assert ('two', 'a.md', 4) == entry[:3]
+        assert self.a.sections[0].sections[0] is entry.section
+
+        assert self.index.get('missing') is None
+        assert 'three' in self.index
+
+    def test_duplicates(self):
+        duplicates = self.index.duplicates()
+        assert ['two'] == list(duplicates)
+        assert [('a.md', 4), ('b.md', 5)] == \
+            [(e.path, e.line) for e in duplicates['two']]
+
+    def test_remove(self):
+        self.index.remove('a.md')
+        assert 'one' not in self.index
+        assert 'b.md' == self.index.get('two').path
+        assert not self.index.duplicates()
+
+        # adding a file again replaces it
+        self.index.add('b.md', Section.from_md('# five {#five}'))
+        assert ['five'] == sorted(e for e in ('three', 'two', 'five')
+                                  if e in self.index)
+
+    def test_dump_load(self):
+        fileobj = io.StringIO()
+        self.index.dump(fileobj)
+        fileobj.seek(0)
+        loaded = AnchorIndex.load(fileobj)
+        for anchor in ('one', 'two', 'three'):
+            expected = self.index.get_all(anchor)
+            result = loaded.get_all(anchor)
+            assert [e[:3] for e in expected] == [e[:3] for e in result]
+            assert all(e.section is None for e in result)
+
+
+DOC_C = """`@{owner: docs}`
+# one
+`@{status: done}` `@{priority: 1}`
+# two
+`@{status: todo}` `@{deprecated}` `@{tags: [a]}`
+# three
+`@{status: done}` `@{priority: true}`
+"""
+
+
+class TestAttributeIndex(unittest.TestCase):
+    def setUp(self):
+        self.c = Section.from_md(DOC_C)
+        self.index = AttributeIndex.from_sections([('c.md', self.c)])
+
+    def headers(self, refs):
+        return [
+            s.header.text[0] if s.header else None
+            for s in self.index.sections(refs)
+        ]
+
+    def test_queries(self):
+        index = self.index
+        assert [None] == self.headers(index.has_key('owner'))
+        assert ['two'] == self.headers(index.has_key('deprecated'))
+        assert ['one', 'three'] == self.headers(index.equals('status', 'done'))
+        assert ['one', 'two', 'three'] == self.headers(
+            index.in_set('status', ['done', 'todo']))
+        assert ['one'] == self.headers(index.equals('priority', 1))
+        assert ['three'] == self.headers(index.equals('priority', True))
+        assert [] == self.headers(index.equals('status', 'missing'))
+        self.assertRaises(TypeError, index.equals, 'tags', ['a'])
+
+    def test_combine(self):
+        index = self.index
+        done_or_deprecated = (index.equals('status', 'done')
+                              | index.has_key('deprecated'))
+        assert ['one', 'two', 'three'] == self.headers(done_or_deprecated)
+        done_and_one = (index.equals('status', 'done')
+                        & index.equals('priority', 1))
+        assert ['one'] == self.headers(done_and_one)
+
+    def test_update(self):
+        self.index.add('c.md', Section.from_md('# four\n`@{status: done}`'))
+        assert ['four'] == self.headers(self.index.equals('status', 'done'))
+        assert not self.index.has_key('deprecated')
+        self.index.remove('c.md')
+        assert not self.index.has_key('status')
+        assert [] == self.index.paths()
+
+    def test_edited(self):
+        root = Section.from_md('`@{status: todo}`\n')
+        index = AttributeIndex.from_sections([('e.md', root)])
+        root.apply_edit(0, 1, ['`@{status: done}`'])
+        index.add('e.md', root)
+        assert not index.equals('status', 'todo')
+        assert [None] == [
+            s.header for s in index.sections(index.equals('status', 'done'))
+        ]
@@ -0,0 +1,115 @@
+"""
+Test lazily loaded sections.
+"""
+
+import os
+import shutil
+import tempfile
+import unittest
+from anchor_txt.section import Section
+
+SCRIPT_PATH = os.path.realpath(__file__)
+TEST_DIR = os.path.dirname(SCRIPT_PATH)
+SPLITS_DIR = os.path.join(TEST_DIR, "splits")
+ATTRS_DIR = os.path.join(TEST_DIR, "attributes")
+
+DOC = '''preamble `@{top}`
+
+# one {#one}
+```
+# not a header
+```
+`@{a: 1}`
+## one.a
+## one.b
+
+    # indented
+# two
+```yaml @
+b: [}
+```
+'''
+
+
+def walk(section):
+    yield section
+    for child in section.sections:
+        for sub in walk(child):
+            yield sub
+
+
+class TestLazy(unittest.TestCase):
+    def test_files(self):
+        for directory in (SPLITS_DIR, ATTRS_DIR):
+            for name in sorted(os.listdir(directory)):
+                if not name.endswith('.md'):
+                    continue
+                path = os.path.join(directory, name)
+                expected = Section.from_md_path(path)
+                result = Section.from_md_path(path, lazy=True)
+                assert expected == result, path
+                result = Section.from_md_path(path, mmap=True)
+                assert expected == result, path
+
+    def test_outline(self):
+        root = Section.from_md(DOC, lazy=True)
+        headers = [(s.header.level, s.header.text) for s in walk(root)
+                   if s.header]
+        assert [(1, ['one']), (2, ['one.a', 'one.b']),
+                (1, ['two'])] == headers
+        assert not any(s.is_loaded() for s in walk(root))
+
+        # spans don't load the sections
+        assert 11 == root.spans()[-1][1]
+        assert not any(s.is_loaded() for s in walk(root))
+
+        # neither does writing them
+        assert DOC.split('\n') == root.to_lines()
+        assert not any(s.is_loaded() for s in walk(root))
+
+    def test_materialize(self):
+        root = Section.from_md(DOC, lazy=True)
+        one = root.sections[0]
+        assert {'a': 1} == one.attributes
+        assert one.is_loaded()
+        assert not root.is_loaded()
+        assert {'top': None} == root.attributes
+
+    def test_errors(self):
+        root = Section.from_md(DOC, lazy=True)
+        two = root.sections[1]
+        try:
+            two.attributes
+            assert False
+        except ValueError as err:
+            assert 13 == err.line
+        # the error is raised again
+        self.assertRaises(ValueError, lambda: two.contents)
+
+
+class TestMapped(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp)
+
+    def check(self, text):
+        path = os.path.join(self.tmp, 'doc.md')
+        with open(path, 'wb') as fdesc:
+            fdesc.write(text.encode('utf-8'))
+        expected = Section.from_md_path(path)
+        result = Section.from_md_path(path, mmap=True)
+        assert expected == result, repr(text)
+        assert expected.to_lines() == result.to_lines()
+        assert expected.to_lines() == list(
+            Section.from_md_path(path, mmap=True).iter_lines())
+
+    def test_mapped(self):
+        doc = DOC.replace('b: [}', 'b: [1]')
+        self.check(doc)
+        self.check(doc.replace('\n', '\r\n'))
+        self.check(doc.rstrip('\n'))
+        self.check(u'# \u00fcnicode {#\u00fc}\n\u00e4 `@{\u00f6}`\n')
+        for text in ('', '\n', '# a', '# a\n', 'a\n# b\n\n# c', '# a\n# a'):
+            self.check(text)
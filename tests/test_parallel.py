@@ -0,0 +1,83 @@
+"""
+Test parsing a single document in many processes.
+"""
+
+import pickle
+import unittest
+
+from anchor_txt import Section
+from anchor_txt import attributes
+from anchor_txt import section
+
+MD = '''intro
+```yaml @
+a: 1
+```
+
+# one {#one}
+text
+
+```
+# not a header
+```
+
+## one.1 {#one.1}
+```yaml @
+b: 2
+```
+### one.1.i
+## one.2
+# two
+[ref]: http://example.com
+    # indented
+#### deep
+'''
+
+
+def big_md(count):
+    return ''.join(MD.replace('{#', '{{#{}-'.format(i))
+                   for i in range(count))
+
+
+class TestChunks(unittest.TestCase):
+    def test_rejoin(self):
+        md = big_md(20)
+        chunks = section._chunk_text(md, 8)
+        assert len(chunks) == 8
+        assert '\n'.join(text for text, _ in chunks) == md
+        lines = md.split('\n')
+        for text, line_num in chunks:
+            first = text.split('\n', 1)[0]
+            assert lines[line_num - 1] == first
+        for text, _ in chunks[1:]:
+            assert text.startswith('#')
+            assert not text.startswith('# not a header')
+
+    def test_single(self):
+        assert section._chunk_text('no headers\n', 4) == [('no headers\n', 1)]
+
+
+class TestParallel(unittest.TestCase):
+    def test_identical(self):
+        for md in (big_md(30), big_md(30).replace('\n', '\r\n'),
+                   big_md(30).rstrip('\n'), '```\n# a\n```\n' + big_md(5)):
+            expected = Section.from_md(md)
+            result = Section.from_md_parallel(md, workers=2)
+            assert result == expected
+            assert result.to_lines() == expected.to_lines()
+
+    def test_fallback(self):
+        md = big_md(3)
+        assert Section.from_md_parallel(md, workers=1) == Section.from_md(md)
+
+    def test_decode_error(self):
+        error = attributes.DecodeError(3, 'bad')
+        loaded = pickle.loads(pickle.dumps(error))
+        assert (loaded.line, loaded.error) == (3, 'bad')
+
+        md = big_md(10) + '# bad\n```yaml @\n- [\n```\n'
+        with self.assertRaises(attributes.DecodeError) as serial:
+            Section.from_md(md)
+        with self.assertRaises(attributes.DecodeError) as parallel:
+            Section.from_md_parallel(md, workers=2)
+        assert parallel.exception.line == serial.exception.line
@@ -0,0 +1,75 @@
+"""
+Test streaming serialization.
+"""
+
+import io
+import os
+import json
+import unittest
+
+from anchor_txt import Section
+from anchor_txt import serialize
+
+TEST_DIR = os.path.dirname(os.path.realpath(__file__))
+ATTRS_DIR = os.path.join(TEST_DIR, "attributes")
+
+MD = '''# a {#a}
+`@{x: 1}`
+## b
+text
+# c
+'''
+
+
+def load_attribute_files():
+    names = sorted(n for n in os.listdir(ATTRS_DIR) if n.endswith('.md'))
+    return [(name, Section.from_md_path(os.path.join(ATTRS_DIR, name)))
+            for name in names]
+
+
+class TestJson(unittest.TestCase):
+    def test_section(self):
+        """The chunks are identical to ``json.dumps(indent=4)``."""
+        for name, section in load_attribute_files():
+            expected = json.dumps(section.to_dict(), indent=4)
+            assert expected == ''.join(serialize.iter_json(section)), name
+
+    def test_mapping(self):
+        items = load_attribute_files()
+        expected = json.dumps({p: s.to_dict() for p, s in items}, indent=4)
+        assert json.loads(expected) == json.loads(''.join(
+            serialize.iter_json_mapping(items)))
+        assert json.dumps({}, indent=4) == ''.join(
+            serialize.iter_json_mapping([]))
+
+    def test_lazy(self):
+        section = Section.from_md(MD, lazy=True)
+        assert json.dumps(Section.from_md(MD).to_dict(), indent=4) == \
+            ''.join(serialize.iter_json(section))
+
+
+class TestRecords(unittest.TestCase):
+    def test_records(self):
+        records = list(serialize.iter_records(Section.from_md(MD), 'f.md'))
+        assert [(0, None, 0, None, 1), (1, 0, 1, 'a', 1), (2, 1, 2, None, 3),
+                (3, 0, 1, None, 5)] == [(r['index'], r['parent'], r['level'],
+                                         r['anchor'], r['line'])
+                                        for r in records]
+        assert {'x': 1} == records[1]['attributes']
+        assert [{'type': 'TEXT', 'raw': ['text']}] == records[2]['contents']
+        assert all(r['path'] == 'f.md' for r in records)
+
+        records = serialize.iter_records(Section.from_md(MD), contents=False)
+        assert all('contents' not in r for r in records)
+
+    def test_jsonl(self):
+        records = list(serialize.iter_records(Section.from_md(MD)))
+        out = io.StringIO()
+        serialize.dump_jsonl(records, out)
+        lines = out.getvalue().split('\n')
+        assert '' == lines[-1]
+        assert records == [json.loads(line) for line in lines[:-1]]
+
+
+if __name__ == '__main__':
+    unittest.main()
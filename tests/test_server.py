@@ -0,0 +1,198 @@
+"""
+Test the JSON-RPC server.
+"""
+
+import os
+import json
+import shutil
+import tempfile
+import unittest
+
+import six
+
+from anchor_txt import Section
+
+if six.PY2:
+    server = None
+else:
+    import asyncio
+    from anchor_txt import server
+
+MD = '''`@{root: true}`
+# a {#a}
+`@{x: 1}`
+## b {#b}
+`@{y: 2}`
+'''
+
+
+async def close(writer):
+    writer.close()
+    if hasattr(writer, 'wait_closed'):
+        await writer.wait_closed()
+
+
+@unittest.skipIf(server is None, "the server requires python 3.5+")
+class TestServer(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.path = os.path.join(self.tmp, 'a.md')
+        self.write(MD)
+        self.corpus = server.Corpus(
+            Section.iter_md_paths([self.tmp], workers=1))
+        self.loop = asyncio.new_event_loop()
+
+    def tearDown(self):
+        self.loop.close()
+        shutil.rmtree(self.tmp)
+
+    def write(self, text):
+        with open(self.path, 'w') as fdesc:
+            fdesc.write(text)
+
+    def request(self, method, params, req_id=1):
+        line = json.dumps({
+            "jsonrpc": "2.0",
+            "id": req_id,
+            "method": method,
+            "params": params
+        })
+        srv = server.Server(self.corpus)
+        return json.loads(self.loop.run_until_complete(srv.handle_line(line)))
+
+    def test_corpus(self):
+        corpus = self.corpus
+        result = corpus.get_section('b')
+        assert self.path == result['path']
+        assert 4 == result['line']
+        assert {'y': 2} == result['section']['attributes']
+        assert {'x': 1} == corpus.get_attributes('a')
+        assert {'root': True} == corpus.get_attributes(path=self.path)
+        assert [('a', 1, 2), ('b', 2, 4)] == [
+            (h['anchor'], h['level'], h['line'])
+            for h in corpus.list_headers()
+        ]
+        assert [self.path] == corpus.paths()
+
+    def test_request(self):
+        assert {
+            "jsonrpc": "2.0",
+            "id": 1,
+            "result": {
+                'x': 1
+            }
+        } == self.request('get_attributes', {'anchor': 'a'})
+        assert {'y': 2} == self.request('get_attributes', ['b'])['result']
+
+    def test_reparse(self):
+        self.write('# c {#c}\n`@{z: 3}`\n')
+        assert {'path': self.path} == self.request('reparse',
+                                                   [self.path])['result']
+        assert {'z': 3} == self.corpus.get_attributes('c')
+        assert 'a' not in self.corpus.anchors
+
+        self.write('# c {#c}\n`@{z: [}`\n')
+        assert server.SERVER_ERROR == self.request(
+            'reparse', {'path': self.path})['error']['code']
+        assert {'z': 3} == self.corpus.get_attributes('c')
+
+    def test_date(self):
+        self.write('# d {#d}\n`@{due: 2020-01-01}`\n')
+        self.request('reparse', [self.path])
+        assert {'due': '2020-01-01'} == self.request(
+            'get_attributes', ['d'])['result']
+
+    def test_unexpected_error(self):
+        def fail(path):
+            raise RuntimeError("failed: {}".format(path))
+
+        self.corpus.loader = fail
+        error = self.request('reparse', ['x.md'])['error']
+        assert server.SERVER_ERROR == error['code']
+        assert 'failed: x.md' == error['message']
+        # the server keeps answering
+        assert {'x': 1} == self.request('get_attributes', ['a'])['result']
+
+    def test_errors(self):
+        srv = server.Server(self.corpus)
+
+        def error(line):
+            return json.loads(self.loop.run_until_complete(
+                srv.handle_line(line)))['error']['code']
+
+        assert server.PARSE_ERROR == error('{')
+        assert server.INVALID_REQUEST == error('[]')
+        assert server.METHOD_NOT_FOUND == self.request(
+            '__init__', [])['error']['code']
+        assert server.INVALID_PARAMS == self.request(
+            'get_section', {'bad': 1})['error']['code']
+        assert server.INVALID_PARAMS == self.request('reparse',
+                                                     {})['error']['code']
+        assert server.SERVER_ERROR == self.request(
+            'get_section', ['missing'])['error']['code']
+        assert server.SERVER_ERROR == self.request(
+            'list_headers', ['missing.md'])['error']['code']
+
+        # notifications have no response
+        assert self.loop.run_until_complete(
+            srv.handle_line('{"jsonrpc": "2.0", "method": "paths"}')) is None
+
+    def test_unix_socket(self):
+        sock_path = os.path.join(self.tmp, 'server.sock')
+        srv = server.Server(self.corpus)
+
+        async def client(anchor):
+            reader, writer = await asyncio.open_unix_connection(sock_path)
+            results = []
+            for req_id in range(3):
+                writer.write(
+                    json.dumps({
+                        "jsonrpc": "2.0",
+                        "id": req_id,
+                        "method": "get_attributes",
+                        "params": [anchor]
+                    }).encode('utf-8') + b'\n')
+                await writer.drain()
+                results.append(json.loads(await reader.readline())['result'])
+            await close(writer)
+            return results
+
+        async def run():
+            task = asyncio.ensure_future(srv.serve_unix(sock_path))
+            while not os.path.exists(sock_path):
+                await asyncio.sleep(0.01)
+            results = await asyncio.gather(client('a'), client('b'))
+            task.cancel()
+            return results
+
+        assert [[{'x': 1}] * 3, [{'y': 2}] * 3] == \
+            self.loop.run_until_complete(run())
+
+    def test_long_line(self):
+        sock_path = os.path.join(self.tmp, 'server.sock')
+        srv = server.Server(self.corpus)
+
+        async def client():
+            reader, writer = await asyncio.open_unix_connection(sock_path)
+            writer.write(b'"' + b'x' * (2 ** 17) + b'"\n')
+            await writer.drain()
+            lines = [await reader.readline(), await reader.readline()]
+            await close(writer)
+            return lines
+
+        async def run():
+            task = asyncio.ensure_future(srv.serve_unix(sock_path))
+            while not os.path.exists(sock_path):
+                await asyncio.sleep(0.01)
+            lines = await client()
+            task.cancel()
+            return lines
+
+        response, end = self.loop.run_until_complete(run())
+        assert server.PARSE_ERROR == json.loads(response)['error']['code']
+        # the server closes the connection
+        assert b'' == end
+
+
+if __name__ == '__main__':
+    unittest.main()
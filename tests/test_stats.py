@@ -0,0 +1,67 @@
+"""
+Test the parsing stats.
+"""
+
+import io
+import os
+import unittest
+from anchor_txt import utils
+from anchor_txt.section import Section
+from anchor_txt.stats import Stats
+
+SCRIPT_PATH = os.path.realpath(__file__)
+TEST_DIR = os.path.dirname(SCRIPT_PATH)
+ATTRS_DIR = os.path.join(TEST_DIR, "attributes")
+
+DOC = '''# one
+`@{a}` `@{b: [1]}`
+```json @
+{"c": 1}
+```
+'''
+
+
+class TestStats(unittest.TestCase):
+    def test_nested(self):
+        stats = Stats()
+        with stats.timed('build'):
+            for _ in stats.timed_iter('split', range(3), 'components'):
+                pass
+        assert 3 == stats.counts['components']
+        assert stats.times['build'] > 0
+        assert stats.times['split'] > 0
+        assert stats.total() == sum(stats.times.values())
+
+    def test_from_md(self):
+        stats = Stats()
+        root = Section.from_md(DOC, stats=stats)
+        assert root == Section.from_md(DOC)
+        assert 1 == stats.counts['files']
+        assert 6 == stats.counts['lines']
+        assert 4 == stats.counts['components']
+        assert 3 == stats.counts['attributes']
+        for phase in ('split', 'build', 'decode'):
+            assert stats.times[phase] > 0, phase
+
+    def test_stream(self):
+        class LinesOnly(io.StringIO):
+            def read(self, *args):
+                raise AssertionError("the stream must be read by line")
+
+        stats = Stats()
+        root = Section.from_md_stream(LinesOnly(utils.to_unicode(DOC)),
+                                      stats=stats)
+        assert root == Section.from_md(DOC)
+        assert 6 == stats.counts['lines']
+        assert 4 == stats.counts['components']
+        for phase in ('read', 'split', 'build', 'decode'):
+            assert stats.times[phase] > 0, phase
+
+    def test_from_md_paths(self):
+        stats = Stats()
+        Section.from_md_paths([ATTRS_DIR], workers=2, stats=stats)
+        num_files = len([n for n in os.listdir(ATTRS_DIR) if n.endswith('.md')])
+        assert num_files == stats.counts['files']
+        assert stats.counts['bytes'] > 0
+        assert stats.times['read'] > 0
+        assert 'decode' in stats.report()
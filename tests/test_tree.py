@@ -0,0 +1,76 @@
+"""
+Test walking and (de)serializing section trees without recursion.
+"""
+
+import sys
+import unittest
+
+from anchor_txt import Section
+from anchor_txt import serialize
+
+MD = '''# a
+## a.1
+### a.1.i
+## a.2
+# b
+'''
+
+
+def deep_md(depth):
+    return '\n'.join('{} h{} {{#h{}}}\ntext'.format('#' * (i + 1), i, i)
+                     for i in range(depth)) + '\n'
+
+
+class TestWalk(unittest.TestCase):
+    def headers(self, walk):
+        return [(s.header.text[0] if s.header else None, depth)
+                for s, depth in walk]
+
+    def test_preorder(self):
+        root = Section.from_md(MD)
+        assert [(None, 0), ('a', 1), ('a.1', 2), ('a.1.i', 3), ('a.2', 2),
+                ('b', 1)] == self.headers(root.walk())
+        assert [('a.1', 0), ('a.1.i', 1)] == self.headers(
+            root.sections[0].sections[0].walk())
+
+    def test_postorder(self):
+        root = Section.from_md(MD)
+        assert [('a.1.i', 3), ('a.1', 2), ('a.2', 2), ('a', 1), ('b', 1),
+                (None, 0)] == self.headers(root.walk(postorder=True))
+
+    def test_parents(self):
+        for section, depth in Section.from_md(MD).walk():
+            if depth:
+                assert section in section.parent.sections
+
+
+class TestDeep(unittest.TestCase):
+    def test_deep(self):
+        """Documents nested deeper than the recursion limit."""
+        depth = sys.getrecursionlimit() + 100
+        md = deep_md(depth)
+        root = Section.from_md(md)
+        assert depth == max(d for _, d in root.walk())
+
+        assert md.split('\n') == root.to_lines()
+        spans = root.spans()
+        assert depth + 1 == len(spans)
+        assert (0, 2 * depth + 1) == spans[0][1:]
+        assert (2 * depth - 2, 2 * depth + 1) == spans[-1][1:]
+
+        dct = root.to_dict()
+        loaded = Section.from_dict(dct)
+        assert root == loaded
+        assert loaded.sections[0] is loaded.sections[0].sections[0].parent
+
+        deepest = loaded.spans()[-1][0]
+        deepest.attributes = {'changed': True}
+        assert not root == loaded
+
+        # the streaming json encoder doesn't recurse either
+        chunks = serialize.iter_json(root)
+        assert ''.join(chunks).startswith('{')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -3,9 +3,11 @@ There are several util functions which should be tested
 """
 
 import os
+import sys
 import copy
 import json
 import unittest
+import subprocess
 from anchor_txt import utils
 
 
@@ -32,3 +34,14 @@ class TestUtils(unittest.TestCase):
             assert False
         except ValueError:
             pass
+
+    def test_lazy_imports(self):
+        """Importing anchor_txt must not import the slow optional modules."""
+        code = ('import sys, anchor_txt; '
+                'print(" ".join(m for m in ("yaml", "json", "multiprocessing") '
+                'if m in sys.modules))')
+        env = dict(os.environ)
+        env['PYTHONPATH'] = os.path.dirname(
+            os.path.dirname(os.path.abspath(__file__)))
+        out = subprocess.check_output([sys.executable, '-c', code], env=env)
+        assert b'' == out.strip()
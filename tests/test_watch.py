@@ -0,0 +1,96 @@
+"""
+Test watching files for changes.
+"""
+
+import os
+import shutil
+import tempfile
+import unittest
+from anchor_txt.watch import Watcher
+
+
+class TestWatcher(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.write('a.md', '# a\n`@{a}`\n')
+        self.write('sub/b.md', '# b\n')
+        self.write('ignored.txt', '# ignored\n')
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp)
+
+    def write(self, name, text, mtime=None):
+        path = os.path.join(self.tmp, name)
+        if not os.path.isdir(os.path.dirname(path)):
+            os.makedirs(os.path.dirname(path))
+        with open(path, 'w') as fdesc:
+            fdesc.write(text)
+        if mtime is not None:
+            os.utime(path, (mtime, mtime))
+        return path
+
+    def events(self, events):
+        return [(e.kind, os.path.relpath(e.path, self.tmp)) for e in events]
+
+    def test_poll(self):
+        watcher = Watcher([self.tmp], use_inotify=False)
+        assert [('changed', 'a.md'), ('changed', os.path.join('sub', 'b.md'))
+                ] == self.events(watcher.load())
+        assert {'a': None} == \
+            watcher.sections[os.path.join(self.tmp, 'a.md')].sections[0].attributes
+        assert [] == watcher.poll()
+
+        self.write('a.md', '# a\n`@{b}`\n', mtime=1)
+        self.write('c.md', '`@{c: [}`')
+        os.remove(os.path.join(self.tmp, 'sub', 'b.md'))
+        assert [('changed', 'a.md'), ('error', 'c.md'),
+                ('removed', os.path.join('sub', 'b.md'))
+                ] == self.events(watcher.poll())
+        assert {'b': None} == \
+            watcher.sections[os.path.join(self.tmp, 'a.md')].sections[0].attributes
+
+    def test_file(self):
+        path = os.path.join(self.tmp, 'a.md')
+        watcher = Watcher([path], use_inotify=False)
+        assert [('changed', 'a.md')] == self.events(watcher.load())
+
+    def test_relpath(self):
+        sub = os.path.join(self.tmp, 'sub')
+        outside = os.path.join(sub, '..', 'sub')
+        watcher = Watcher([outside, os.path.join(self.tmp, 'a.md')],
+                          use_inotify=False)
+        assert 'b.md' == watcher.relpath(os.path.join(sub, 'b.md'))
+        assert 'a.md' == watcher.relpath(os.path.join(self.tmp, 'a.md'))
+
+    def test_cwd(self):
+        cwd = os.getcwd()
+        os.chdir(self.tmp)
+        try:
+            watcher = Watcher(['.'], use_inotify=False)
+            assert [('changed', 'a.md'),
+                    ('changed', os.path.join('sub', 'b.md'))
+                    ] == self.events(watcher.load())
+        finally:
+            os.chdir(cwd)
+
+    def test_inotify(self):
+        watcher = Watcher([self.tmp])
+        if watcher.is_polling():
+            return
+        watcher.load()
+        self.write('a.md', '# changed\n')
+        self.write('new/d.md', '# d\n')
+        self.write('c.md', '# c\n')
+        changed = []
+        for _ in range(10):
+            # pylint: disable=protected-access
+            paths = watcher._inotify.read(timeout=1)
+            changed.extend(self.events(watcher.check(paths, force=True)))
+            if len(changed) >= 3:
+                break
+        # each file is parsed once, after it was written
+        assert [('changed', 'a.md'),
+                ('changed', os.path.join('new', 'd.md')),
+                ('changed', 'c.md')] == changed
+        assert ['c'] == watcher.sections[os.path.join(
+            self.tmp, 'c.md')].sections[0].header.text